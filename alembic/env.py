@@ -6,7 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.core.config import settings
-from app.db.database import Base
+from app.db.base import Base
 from app.api.models import *  # noqa: F403
 
 DATABASE_URL = settings.database_url
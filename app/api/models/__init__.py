@@ -1 +1,2 @@
 from app.api.models.user import User  # noqa: F401
+from app.api.models.revoked_token import RevokedToken  # noqa: F401
@@ -0,0 +1,16 @@
+"""Revoked token data model"""
+
+from sqlalchemy import Column, String, DateTime
+from app.core.base.model import BaseTableModel
+
+
+class RevokedToken(BaseTableModel):
+    __tablename__ = "revoked_tokens"
+
+    # "jti:<token id>" for a single token, "ver:<user id>:<version>" for
+    # every token minted for a user before their version was bumped
+    key = Column(String, unique=True, nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __str__(self):
+        return "RevokedToken: {}".format(self.key)
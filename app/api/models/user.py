@@ -1,6 +1,6 @@
 """User data model"""
 
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Integer, String
 from app.core.base.model import BaseTableModel
 
 
@@ -10,6 +10,8 @@ class User(BaseTableModel):
     username = Column(String, unique=True, nullable=False)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=True)
+    # Bumped to revoke every token issued to the user so far
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     def __str__(self):
         return "User: {}".format(self.username)
@@ -1,6 +1,9 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.core.base.repository import BaseRepository
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.base.repository import BaseRepository, AsyncBaseRepository
 from app.api.models.user import User
+from app.utils.identity_cache import identity_cache
 
 
 class UserRepository(BaseRepository[User]):
@@ -12,6 +15,10 @@ class UserRepository(BaseRepository[User]):
         db (Session): The SQLAlchemy session.
     """
 
+    identity_cache = identity_cache
+    # Usernames are unique too, upsert_many rejects rows only colliding on one
+    upsert_keys = ("email",)
+
     def __init__(self, db: Session):
         super().__init__(User, db)
     
@@ -25,3 +32,28 @@ class UserRepository(BaseRepository[User]):
             User: The user object if found, None otherwise.
         """
         return self.db.query(self.model).filter(self.model.email == email).first()
+
+
+class AsyncUserRepository(AsyncBaseRepository[User]):
+    """
+    Async user repository class for CRUD operations on User model.
+    Attributes:
+        model (Type[User]): The SQLAlchemy User model class.
+        db (AsyncSession): The SQLAlchemy async session.
+    """
+
+    identity_cache = identity_cache
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(User, db)
+
+    async def get_by_email(self, email: str) -> User:
+        """Get a user by email.
+
+        Args:
+            email (str): The email of the user.
+
+        Returns:
+            User: The user object if found, None otherwise.
+        """
+        return await self.db.scalar(select(self.model).where(self.model.email == email))
@@ -1,13 +1,32 @@
+from typing import Optional
+
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.utils import password_utils
+from app.core import response_messages
+from app.utils import jwt_helpers, login_throttle, password_utils, revocation
 from app.api.v1.auth import schemas
 from app.api.models.user import User
-from app.api.repositories.user import UserRepository
+from app.api.repositories.user import UserRepository, AsyncUserRepository
 from app.utils.logger import logger
 
 
+def _invalid_login_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=response_messages.INVALID_LOGIN,
+    )
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=response_messages.INVALID_CREDENTIALS,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 class UserService:
     """
     User service class for handling user-related operations.
@@ -24,20 +43,24 @@ class UserService:
         Returns:
             User: User object for the newly created user
         """
-        # check if user with email already exists
-        if self.repository.get_by_email(schema.email):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User with this email already exists!",
-            )
-
         # Hash password
-        schema.password = password_utils.hash_password(password=schema.password)
+        schema.password = password_utils.run_hashing_task(
+            password_utils.hash_password, schema.password
+        )
 
         user = User(**schema.model_dump())
 
+        # The unique constraints on email and username do the existence
+        # check in the same statement as the insert
         logger.info(f"Creating user with email: {user.email}")
-        return self.repository.create(user)
+        created = self.repository.create_if_absent(user)
+        if created is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=response_messages.USER_ALREADY_EXISTS,
+            )
+        login_throttle.unknown_emails.discard(created.email)
+        return created
 
     def authenticate(self, schema: schemas.LoginRequest) -> User:
         """Authenticates a registered user
@@ -46,20 +69,142 @@ class UserService:
         Returns:
             User: Authenticated user
         """
+        # Blocked accounts are rejected before any query or hashing
+        login_throttle.ensure_login_allowed(schema.email)
+
         # check if user with the email exists
-        user = self.repository.get_by_email(schema.email)
+        user = None
+        if schema.email not in login_throttle.unknown_emails:
+            user = self.repository.get_by_email(schema.email)
 
         if not user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid email",
-            )
+            login_throttle.unknown_emails.add(schema.email)
+            login_throttle.record_login_failure(schema.email)
+            password_utils.run_hashing_task(password_utils.dummy_verify, schema.password)
+            raise _invalid_login_exception()
+
+        verified, new_hash = password_utils.run_hashing_task(
+            password_utils.verify_and_update_password, schema.password, user.password
+        )
+        if not verified:
+            login_throttle.record_login_failure(schema.email)
+            raise _invalid_login_exception()
+
+        login_throttle.record_login_success(schema.email)
+
+        # The hash has an outdated cost, store the one computed with the
+        # current settings
+        if new_hash:
+            user = self.repository.update_fields(user.id, password=new_hash) or user
 
-        if not password_utils.verify_password(schema.password, user.password):
+        logger.info(f"User authenticated with email: {user.email}")
+        return user
+
+    def logout(self, access_token: str, refresh_token: Optional[str] = None) -> None:
+        """Revokes the tokens of a session
+        Args:
+            access_token (str): Access token of the session
+            refresh_token (Optional[str]): Refresh token of the session
+        """
+        for token in filter(None, (access_token, refresh_token)):
+            payload = jwt_helpers.decode_jwt_token(token, _credentials_exception())
+            revocation.revoke_token(self.repository.db, payload)
+
+    def revoke_all_tokens(self, user_id: str) -> None:
+        """Revokes every token issued to a user, e.g. when banning them
+        Args:
+            user_id (str): Id of the user
+        """
+        user = self.repository.get(user_id)
+        if user:
+            revocation.revoke_user_tokens(self.repository.db, user)
+            logger.info(f"Revoked all tokens of user: {user.email}")
+
+
+class AsyncUserService:
+    """
+    Async user service class for handling user-related operations.
+    This class mirrors UserService on top of an AsyncSession.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.repository = AsyncUserRepository(db)
+
+    async def register(self, schema: schemas.RegisterRequest) -> User:
+        """Creates a new user
+        Args:
+            schema (schemas.RegisterRequest): Registration schema
+        Returns:
+            User: User object for the newly created user
+        """
+        # Hash password
+        schema.password = await password_utils.hash_password_async(schema.password)
+
+        user = User(**schema.model_dump())
+
+        logger.info(f"Creating user with email: {user.email}")
+        created = await self.repository.create_if_absent(user)
+        if created is None:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid password",
+                status_code=status.HTTP_409_CONFLICT,
+                detail=response_messages.USER_ALREADY_EXISTS,
             )
+        login_throttle.unknown_emails.discard(created.email)
+        return created
+
+    async def authenticate(self, schema: schemas.LoginRequest) -> User:
+        """Authenticates a registered user
+        Args:
+            schema (schemas.LoginRequest): Login Request schema
+        Returns:
+            User: Authenticated user
+        """
+        login_throttle.ensure_login_allowed(schema.email)
+
+        # check if user with the email exists
+        user = None
+        if schema.email not in login_throttle.unknown_emails:
+            user = await self.repository.get_by_email(schema.email)
+
+        if not user:
+            login_throttle.unknown_emails.add(schema.email)
+            login_throttle.record_login_failure(schema.email)
+            await password_utils.dummy_verify_async(schema.password)
+            raise _invalid_login_exception()
+
+        verified, new_hash = await password_utils.verify_and_update_password_async(
+            schema.password, user.password
+        )
+        if not verified:
+            login_throttle.record_login_failure(schema.email)
+            raise _invalid_login_exception()
+
+        login_throttle.record_login_success(schema.email)
+
+        if new_hash:
+            user = await self.repository.update_fields(user.id, password=new_hash) or user
 
         logger.info(f"User authenticated with email: {user.email}")
         return user
+
+    async def logout(
+        self, access_token: str, refresh_token: Optional[str] = None
+    ) -> None:
+        """Revokes the tokens of a session
+        Args:
+            access_token (str): Access token of the session
+            refresh_token (Optional[str]): Refresh token of the session
+        """
+        for token in filter(None, (access_token, refresh_token)):
+            payload = jwt_helpers.decode_jwt_token(token, _credentials_exception())
+            await self.repository.db.run_sync(revocation.revoke_token, payload)
+
+    async def revoke_all_tokens(self, user_id: str) -> None:
+        """Revokes every token issued to a user, e.g. when banning them
+        Args:
+            user_id (str): Id of the user
+        """
+        user = await self.repository.get(user_id)
+        if user:
+            await self.repository.db.run_sync(revocation.revoke_user_tokens, user)
+            logger.info(f"Revoked all tokens of user: {user.email}")
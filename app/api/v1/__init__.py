@@ -1,7 +1,14 @@
 from fastapi import APIRouter
 
-from app.api.v1.auth.routes import auth
+from app.core.config import settings
+from app.api.v1.internal.routes import internal
+
+if settings.DATABASE_ASYNC:
+    from app.api.v1.auth.async_routes import auth
+else:
+    from app.api.v1.auth.routes import auth
 
 main_router = APIRouter(prefix="/api/v1")
 
 main_router.include_router(router=auth)
+main_router.include_router(router=internal)
@@ -0,0 +1,208 @@
+from fastapi import APIRouter, Depends, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Optional
+
+from app.core.config import settings
+from app.core.rate_limit import limiter
+from app.core.http_cache import conditional_response, identity_etag
+from app.core.responses import ModelJSONResponse, route_class
+from app.db.database import async_get_db
+from app.utils import jwt_helpers
+from app.core.dependencies.security import async_get_current_user, oauth_scheme
+from app.core.base.schema import BaseResponseModel
+
+from app.api.v1.auth import schemas
+from app.api.services.user import AsyncUserService
+from app.utils.identity_cache import UserIdentity
+
+auth = APIRouter(prefix="/auth", tags=["Authentication"], route_class=route_class)
+
+
+@auth.post(
+    path="/register",
+    status_code=status.HTTP_201_CREATED,
+    response_model=schemas.AuthResponse,
+    summary="Create a new user account",
+    description="This endpoint takes in the user creation details and returns jwt tokens along with user data",
+    tags=["Authentication"],
+)
+@limiter.limit(settings.RATE_LIMIT_REGISTER)
+async def register(
+    request: Request,
+    schema: schemas.RegisterRequest,
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+):
+    """Endpoint for a user to register their account
+
+    Args:
+    request (Request): Incoming request, used for rate limiting
+    schema (schemas.RegisterRequest): Register request schema
+    db (Annotated[AsyncSession, Depends): Async database session
+    """
+
+    # Create user account
+
+    service = AsyncUserService(db=db)
+
+    user = await service.register(schema=schema)
+
+    # Create access and refresh tokens
+    claims = jwt_helpers.identity_claims(user)
+    access_token = jwt_helpers.create_jwt_token("access", user.id, claims=claims)
+    refresh_token = jwt_helpers.create_jwt_token("refresh", user.id, claims=claims)
+
+    response_data = schemas.AuthResponseData(
+        id=user.id, username=user.username, email=user.email
+    )
+
+    return schemas.AuthResponse(
+        status_code=status.HTTP_201_CREATED,
+        message="User registered successfully",
+        access_token=access_token,
+        refresh_token=refresh_token,
+        data=response_data,
+    )
+
+
+@auth.post(
+    path="/login",
+    status_code=status.HTTP_200_OK,
+    response_model=schemas.AuthResponse,
+    summary="Login a registered user",
+    description="This endpoint retrieves the jwt tokens for a registered user",
+    tags=["Authentication"],
+)
+@limiter.limit(settings.RATE_LIMIT_LOGIN)
+async def login(
+    request: Request,
+    schema: schemas.LoginRequest,
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+):
+    """Endpoint for user login
+
+    Args:
+        request (Request): Incoming request, used for rate limiting
+        schema (schemas.LoginRequest): Login request schema
+        db (Annotated[AsyncSession, Depends): Async database session
+    """
+
+    service = AsyncUserService(db=db)
+
+    user = await service.authenticate(schema=schema)
+
+    # Create access and refresh tokens
+    claims = jwt_helpers.identity_claims(user)
+    access_token = jwt_helpers.create_jwt_token("access", user.id, claims=claims)
+    refresh_token = jwt_helpers.create_jwt_token("refresh", user.id, claims=claims)
+
+    response_data = schemas.AuthResponseData(
+        id=user.id, username=user.username, email=user.email
+    )
+
+    return schemas.AuthResponse(
+        status_code=status.HTTP_201_CREATED,
+        message="User logged in successfully",
+        access_token=access_token,
+        refresh_token=refresh_token,
+        data=response_data,
+    )
+
+
+@auth.post(
+    path="/logout",
+    status_code=status.HTTP_200_OK,
+    response_model=BaseResponseModel,
+    summary="Logout the current session",
+    description="This endpoint revokes the access token and, if provided, the refresh token of the session",
+    tags=["Authentication"],
+)
+async def logout(
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+    access_token: Annotated[str, Depends(oauth_scheme)],
+    schema: Optional[schemas.LogoutRequest] = None,
+):
+    """Endpoint to logout a user
+
+    Args:
+        db (Annotated[AsyncSession, Depends): Database session
+        access_token (Annotated[str, Depends): JWT access token
+        schema (Optional[schemas.LogoutRequest]): Logout request schema, the
+            body may be left out to revoke only the access token
+    """
+
+    service = AsyncUserService(db=db)
+
+    refresh_token = schema.refresh_token if schema else None
+    await service.logout(access_token, refresh_token=refresh_token)
+
+    return BaseResponseModel(
+        status_code=status.HTTP_200_OK,
+        message="User logged out successfully",
+    )
+
+
+@auth.post(
+    path="/token/refresh",
+    response_model=schemas.TokenRefreshResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Refresh tokens",
+    description="This endpoint uses the current refresh token to create new access and refresh tokens",
+    tags=["Authentication"],
+)
+async def refresh_token(schema: schemas.TokenRefreshRequest):
+    """Endpoint to refresh the access token
+
+    Args:
+        schema (schemas.TokenRefreshRequest): Refresh Token Schema
+
+    Returns:
+        _type_: Refresh Token Response
+    """
+    token = jwt_helpers.refresh_access_token(refresh_token=schema.refresh_token if schema else None)
+
+    return schemas.TokenRefreshResponse(
+        status_code=status.HTTP_200_OK,
+        message="Access token refreshed successfully",
+        access_token=token,
+    )
+
+
+@auth.get(
+    path="/user",
+    response_model=schemas.UserResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get user details",
+    description="This endpoint retrieves the details of the logged-in user",
+    tags=["Authentication"],
+)
+async def get_user(
+    request: Request,
+    current_user: Annotated[UserIdentity, Depends(async_get_current_user)],
+):
+    """Endpoint to get the logged in user
+
+    Clients sending the ETag of their copy in If-None-Match get an empty
+    304 while the user is unchanged.
+
+    Args:
+        request (Request): Incoming request, for its If-None-Match header
+        current_user (Annotated[UserIdentity, Depends): Logged in user
+    """
+
+    message = "User Details Retrieved"
+
+    def render():
+        user_schema = schemas.AuthResponseData(
+            id=current_user.id, username=current_user.username, email=current_user.email
+        )
+        return ModelJSONResponse(
+            schemas.UserResponse(
+                status_code=status.HTTP_200_OK,
+                message=message,
+                data=user_schema,
+            )
+        )
+
+    return conditional_response(
+        request, identity_etag(current_user, message), render, private=True
+    )
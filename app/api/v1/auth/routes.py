@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from sqlalchemy.orm import Session
-from typing import Annotated
+from typing import Annotated, Optional
 
+from app.core.config import settings
+from app.core.rate_limit import limiter
+from app.core.http_cache import conditional_response, identity_etag
+from app.core.responses import ModelJSONResponse, route_class
 from app.db.database import get_db
 from app.utils import jwt_helpers
-from app.core.dependencies.security import get_current_user
+from app.core.dependencies.security import get_current_user, oauth_scheme
+from app.core.base.schema import BaseResponseModel
 
 from app.api.v1.auth import schemas
 from app.api.services.user import UserService
-from app.api.models.user import User
+from app.utils.identity_cache import UserIdentity
 
-auth = APIRouter(prefix="/auth", tags=["Authentication"])
+auth = APIRouter(prefix="/auth", tags=["Authentication"], route_class=route_class)
 
 
 @auth.post(
@@ -21,13 +26,16 @@ auth = APIRouter(prefix="/auth", tags=["Authentication"])
     description="This endpoint takes in the user creation details and returns jwt tokens along with user data",
     tags=["Authentication"],
 )
+@limiter.limit(settings.RATE_LIMIT_REGISTER)
 def register(
+    request: Request,
     schema: schemas.RegisterRequest,
     db: Annotated[Session, Depends(get_db)],
 ):
     """Endpoint for a user to register their account
 
     Args:
+    request (Request): Incoming request, used for rate limiting
     schema (schemas.LoginRequest): Login request schema
     db (Annotated[Session, Depends): Database session
     """
@@ -36,11 +44,12 @@ def register(
 
     service = UserService(db=db)
 
-    user = service.register(db=db, schema=schema)
+    user = service.register(schema=schema)
 
     # Create access and refresh tokens
-    access_token = jwt_helpers.create_jwt_token("access", user.id)
-    refresh_token = jwt_helpers.create_jwt_token("refresh", user.id)
+    claims = jwt_helpers.identity_claims(user)
+    access_token = jwt_helpers.create_jwt_token("access", user.id, claims=claims)
+    refresh_token = jwt_helpers.create_jwt_token("refresh", user.id, claims=claims)
 
     response_data = schemas.AuthResponseData(
         id=user.id, username=user.username, email=user.email
@@ -63,24 +72,28 @@ def register(
     description="This endpoint retrieves the jwt tokens for a registered user",
     tags=["Authentication"],
 )
+@limiter.limit(settings.RATE_LIMIT_LOGIN)
 def login(
+    request: Request,
     schema: schemas.LoginRequest,
     db: Annotated[Session, Depends(get_db)],
 ):
     """Endpoint for user login
 
     Args:
+        request (Request): Incoming request, used for rate limiting
         schema (schemas.LoginRequest): Login request schema
         db (Annotated[Session, Depends): Database session
     """
 
     service = UserService(db=db)
 
-    user = service.authenticate(db=db, schema=schema)
+    user = service.authenticate(schema=schema)
 
     # Create access and refresh tokens
-    access_token = jwt_helpers.create_jwt_token("access", user.id)
-    refresh_token = jwt_helpers.create_jwt_token("refresh", user.id)
+    claims = jwt_helpers.identity_claims(user)
+    access_token = jwt_helpers.create_jwt_token("access", user.id, claims=claims)
+    refresh_token = jwt_helpers.create_jwt_token("refresh", user.id, claims=claims)
 
     response_data = schemas.AuthResponseData(
         id=user.id, username=user.username, email=user.email
@@ -95,6 +108,39 @@ def login(
     )
 
 
+@auth.post(
+    path="/logout",
+    status_code=status.HTTP_200_OK,
+    response_model=BaseResponseModel,
+    summary="Logout the current session",
+    description="This endpoint revokes the access token and, if provided, the refresh token of the session",
+    tags=["Authentication"],
+)
+def logout(
+    db: Annotated[Session, Depends(get_db)],
+    access_token: Annotated[str, Depends(oauth_scheme)],
+    schema: Optional[schemas.LogoutRequest] = None,
+):
+    """Endpoint to logout a user
+
+    Args:
+        db (Annotated[Session, Depends): Database session
+        access_token (Annotated[str, Depends): JWT access token
+        schema (Optional[schemas.LogoutRequest]): Logout request schema, the
+            body may be left out to revoke only the access token
+    """
+
+    service = UserService(db=db)
+
+    refresh_token = schema.refresh_token if schema else None
+    service.logout(access_token, refresh_token=refresh_token)
+
+    return BaseResponseModel(
+        status_code=status.HTTP_200_OK,
+        message="User logged out successfully",
+    )
+
+
 @auth.post(
     path="/token/refresh",
     response_model=schemas.TokenRefreshResponse,
@@ -112,7 +158,7 @@ def refresh_token(schema: schemas.TokenRefreshRequest):
     Returns:
         _type_: Refresh Token Response
     """
-    token = jwt_helpers.refresh_access_token(refresh_token=schema.refresh_token)
+    token = jwt_helpers.refresh_access_token(refresh_token=schema.refresh_token if schema else None)
 
     return schemas.TokenRefreshResponse(
         status_code=status.HTTP_200_OK,
@@ -129,13 +175,34 @@ def refresh_token(schema: schemas.TokenRefreshRequest):
     description="This endpoint retrieves the details of the logged-in user",
     tags=["Authentication"],
 )
-def get_user(current_user: Annotated[User, Depends(get_current_user)]):
-    user_schema = schemas.AuthResponseData(
-        id=current_user.id, username=current_user.username, email=current_user.email
-    )
+def get_user(
+    request: Request,
+    current_user: Annotated[UserIdentity, Depends(get_current_user)],
+):
+    """Endpoint to get the logged in user
 
-    return schemas.UserResponse(
-        status_code=status.HTTP_200_OK,
-        message="User Details Retrieved",
-        data=user_schema,
+    Clients sending the ETag of their copy in If-None-Match get an empty
+    304 while the user is unchanged.
+
+    Args:
+        request (Request): Incoming request, for its If-None-Match header
+        current_user (Annotated[UserIdentity, Depends): Logged in user
+    """
+
+    message = "User Details Retrieved"
+
+    def render():
+        user_schema = schemas.AuthResponseData(
+            id=current_user.id, username=current_user.username, email=current_user.email
+        )
+        return ModelJSONResponse(
+            schemas.UserResponse(
+                status_code=status.HTTP_200_OK,
+                message=message,
+                data=user_schema,
+            )
+        )
+
+    return conditional_response(
+        request, identity_etag(current_user, message), render, private=True
     )
@@ -1,4 +1,4 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
 from pydantic import BaseModel, StringConstraints, EmailStr
 from app.core.base.schema import BaseResponseModel
@@ -18,6 +18,10 @@ class TokenRefreshRequest(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
 class TokenRefreshResponse(BaseResponseModel):
     access_token: str
 
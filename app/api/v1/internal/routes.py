@@ -0,0 +1,63 @@
+from typing import Iterator
+
+from fastapi import APIRouter, Depends, status
+
+from app.db.database import get_read_session_factory, pool_stats
+from app.db.session import RequestSession
+from app.core.dependencies.security import require_internal_key
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+from app.utils.streaming import ndjson_response
+
+internal = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_key)],
+)
+
+
+@internal.get(
+    path="/db/pool",
+    status_code=status.HTTP_200_OK,
+    summary="Connection pool statistics",
+    description="This endpoint returns the usage and checkout counters of the database connection pools of this worker",
+)
+def get_pool_stats():
+    return {
+        "status_code": status.HTTP_200_OK,
+        "message": "Connection pool statistics retrieved",
+        "data": pool_stats(),
+    }
+
+
+def iter_users() -> Iterator[User]:
+    """Every user, read in batches from a session of its own
+
+    The request's dependencies are closed before a streaming body is
+    sent, so the session lives as long as the stream instead.
+    """
+
+    db = RequestSession(get_read_session_factory(), read_only=True)
+    try:
+        yield from UserRepository(db).iter_all()
+    finally:
+        db.close()
+
+
+@internal.get(
+    path="/users",
+    status_code=status.HTTP_200_OK,
+    summary="Export all users",
+    description="This endpoint streams every user as newline delimited JSON, in constant memory",
+)
+def export_users():
+    return ndjson_response(
+        iter_users(),
+        lambda user: {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "created_at": user.created_at,
+        },
+    )
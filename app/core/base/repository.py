@@ -1,10 +1,57 @@
-from typing import Generic, TypeVar, Type, Optional, List
+import importlib
+from typing import Generic, TypeVar, Type, Optional, List, Iterable, Iterator, Sequence, Union
+from sqlalchemy import select, func, insert, update, delete, inspect
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.base.model import BaseTableModel
+from app.utils.identity_cache import IdentityCache
 
 Model = TypeVar("T", bound=BaseTableModel)
 
+# Dialects whose INSERT supports ON CONFLICT and RETURNING, imported on
+# first use so only the dialect in use is loaded
+DIALECT_INSERTS = {
+    "postgresql": "sqlalchemy.dialects.postgresql",
+    "sqlite": "sqlalchemy.dialects.sqlite",
+}
+
+
+def column_values(model: Type[Model], obj: Union[Model, dict]) -> dict:
+    """Column values set on an unsaved object, or the dict itself"""
+
+    if isinstance(obj, dict):
+        return obj
+
+    return {
+        prop.key: getattr(obj, prop.key)
+        for prop in inspect(model).column_attrs
+        if prop.key in obj.__dict__
+    }
+
+
+def dialect_insert(model: Type[Model], db: Union[Session, AsyncSession]):
+    """Dialect specific INSERT construct supporting ON CONFLICT"""
+
+    dialect = db.get_bind().dialect.name
+    if dialect not in DIALECT_INSERTS:
+        raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+    return importlib.import_module(DIALECT_INSERTS[dialect]).insert(model)
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable into lists of at most `size` items"""
+
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 
 class BaseRepository(Generic[Model]):
     """
@@ -14,24 +61,64 @@ class BaseRepository(Generic[Model]):
     Attributes:
         model (Type[Model]): The SQLAlchemy model class.
         db (Session): The SQLAlchemy session.
+        identity_cache (Optional[IdentityCache]): Cache invalidated on update and delete.
+        upsert_keys (Sequence[str]): Unique columns upsert_many resolves conflicts on.
     """
 
+    identity_cache: Optional[IdentityCache] = None
+    upsert_keys: Sequence[str] = ("id",)
+
     def __init__(self, model: Type[Model], db: Session):
         self.model = model
         self.db = db
 
+    def _invalidate(self, id: str) -> None:
+        """Drop a written object from the identity cache, if one is attached"""
+
+        if self.identity_cache is not None:
+            self.identity_cache.invalidate(id)
+
     def create(self, obj: Model) -> Model:
         """Create a new object of the model.
+
+        The row is written with a single INSERT ... RETURNING, so server
+        defaults such as created_at come back without a refresh. The
+        object is only usable after the commit with a session made with
+        expire_on_commit=False, as the application's sessions are;
+        otherwise it's expired and loads again, or fails once detached.
+
         Args:
             obj (Model): The object to be created.
         Returns:
-            Model: The created object.
+            Model: The created object, as loaded from the RETURNING clause.
         """
 
-        self.db.add(obj)
+        created = self.db.scalars(
+            insert(self.model).returning(self.model), [column_values(self.model, obj)]
+        ).one()
         self.db.commit()
-        self.db.refresh(obj)
-        return obj
+        return created
+
+    def create_if_absent(self, obj: Model) -> Optional[Model]:
+        """Create a new object unless it conflicts with a unique constraint.
+
+        Uses INSERT ... ON CONFLICT DO NOTHING RETURNING, so the existence
+        check and the insert are one statement and can't race.
+
+        Args:
+            obj (Model): The object to be created.
+        Returns:
+            Optional[Model]: The created object, None if a conflicting row exists.
+        """
+
+        created = self.db.scalars(
+            dialect_insert(self.model, self.db)
+            .values(**column_values(self.model, obj))
+            .on_conflict_do_nothing()
+            .returning(self.model)
+        ).one_or_none()
+        self.db.commit()
+        return created
 
     def get(self, id: str) -> Optional[Model]:
         """Get an object of the model by id.
@@ -54,6 +141,45 @@ class BaseRepository(Generic[Model]):
 
         return self.db.query(self.model).all()
 
+    def iter_all(self, batch_size: Optional[int] = None) -> Iterator[Model]:
+        """Iterate over all objects of the model without loading them all at once.
+
+        Rows are fetched from a server-side cursor `batch_size` at a time,
+        so memory use stays constant regardless of the table size.
+
+        Args:
+            batch_size (Optional[int]): Rows per fetch, defaults to DATABASE_BATCH_SIZE.
+
+        Yields:
+            Model: Each object of the model in the database.
+        """
+
+        stmt = select(self.model).execution_options(
+            yield_per=batch_size or settings.DATABASE_BATCH_SIZE
+        )
+        yield from self.db.scalars(stmt)
+
+    def page_after(self, cursor: Optional[str], limit: int) -> List[Model]:
+        """Get the page of objects that follows `cursor`, ordered by id.
+
+        Ids are time-ordered uuid7 strings, so keyset pagination on the
+        primary key index replaces OFFSET scans. Pass the id of the last
+        object of a page as the cursor for the next one.
+
+        Args:
+            cursor (Optional[str]): Id of the last object of the previous page,
+                None for the first page.
+            limit (int): Maximum number of objects returned.
+
+        Returns:
+            List[Model]: The objects of the page, an empty list after the last one.
+        """
+
+        stmt = select(self.model).order_by(self.model.id).limit(limit)
+        if cursor is not None:
+            stmt = stmt.where(self.model.id > cursor)
+        return list(self.db.scalars(stmt))
+
     def update(self, obj: Model) -> Model:
         """Update an existing object of the model.
 
@@ -70,8 +196,11 @@ class BaseRepository(Generic[Model]):
         existing_obj = self.get(obj.id)
         if existing_obj:
             for key, value in obj.__dict__.items():
+                if key == "_sa_instance_state":
+                    continue
                 setattr(existing_obj, key, value)
             self.db.commit()
+            self._invalidate(existing_obj.id)
             self.db.refresh(existing_obj)
             return existing_obj
         return None
@@ -92,6 +221,361 @@ class BaseRepository(Generic[Model]):
         if obj:
             self.db.delete(obj)
             self.db.commit()
+            self._invalidate(id)
+            return True
+        return False
+
+    def update_fields(self, id: str, **changes) -> Optional[Model]:
+        """Update only the given columns of an object with a single statement.
+
+        Emits one UPDATE ... WHERE id = :id RETURNING, without loading the
+        object first.
+
+        Args:
+            id (str): The id of the object to update.
+            **changes: Column names and their new values.
+
+        Returns:
+            Optional[Model]: The updated object, None if it wasn't found.
+        """
+
+        updated = self.db.scalars(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**changes)
+            .returning(self.model),
+            execution_options={"populate_existing": True},
+        ).one_or_none()
+        self.db.commit()
+        if updated is not None:
+            self._invalidate(id)
+        return updated
+
+    def delete_by_id(self, id: str) -> bool:
+        """Delete an object of the model by id with a single DELETE statement.
+
+        Args:
+            id (str): The id of the object to delete.
+
+        Returns:
+            bool: True if a row was deleted, False if the object wasn't found.
+        """
+
+        result = self.db.execute(delete(self.model).where(self.model.id == id))
+        self.db.commit()
+        if result.rowcount:
+            self._invalidate(id)
+        return bool(result.rowcount)
+
+    def update_many(
+        self, ids: Sequence[str], batch_size: Optional[int] = None, **changes
+    ) -> int:
+        """Apply the same column changes to many objects.
+
+        Each chunk of ids is updated with one UPDATE ... WHERE id IN (...).
+
+        Args:
+            ids (Sequence[str]): The ids of the objects to update.
+            batch_size (Optional[int]): Ids per statement, defaults to DATABASE_BATCH_SIZE.
+            **changes: Column names and their new values.
+
+        Returns:
+            int: The number of updated rows.
+        """
+
+        updated = 0
+        for chunk in chunked(ids, batch_size or settings.DATABASE_BATCH_SIZE):
+            result = self.db.execute(
+                update(self.model).where(self.model.id.in_(chunk)).values(**changes)
+            )
+            self.db.commit()
+            updated += result.rowcount
+            for id in chunk:
+                self._invalidate(id)
+        return updated
+
+    def delete_many(self, ids: Sequence[str], batch_size: Optional[int] = None) -> int:
+        """Delete many objects by id.
+
+        Each chunk of ids is deleted with one DELETE ... WHERE id IN (...).
+
+        Args:
+            ids (Sequence[str]): The ids of the objects to delete.
+            batch_size (Optional[int]): Ids per statement, defaults to DATABASE_BATCH_SIZE.
+
+        Returns:
+            int: The number of deleted rows.
+        """
+
+        deleted = 0
+        for chunk in chunked(ids, batch_size or settings.DATABASE_BATCH_SIZE):
+            result = self.db.execute(delete(self.model).where(self.model.id.in_(chunk)))
+            self.db.commit()
+            deleted += result.rowcount
+            for id in chunk:
+                self._invalidate(id)
+        return deleted
+
+    def create_many(
+        self, objs: Iterable[Union[Model, dict]], batch_size: Optional[int] = None
+    ) -> List[Model]:
+        """Create many objects of the model.
+
+        Rows are sent as multi-row INSERT ... RETURNING statements, one
+        transaction per chunk of `batch_size` rows, so server defaults come
+        back without a refresh per row.
+
+        Args:
+            objs (Iterable[Union[Model, dict]]): Unsaved objects or column values.
+            batch_size (Optional[int]): Rows per chunk, defaults to DATABASE_BATCH_SIZE.
+
+        Returns:
+            List[Model]: The created objects, in input order.
+        """
+
+        created = []
+        for chunk in chunked(objs, batch_size or settings.DATABASE_BATCH_SIZE):
+            rows = [column_values(self.model, obj) for obj in chunk]
+            created.extend(
+                self.db.scalars(
+                    insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                    rows,
+                ).all()
+            )
+            self.db.commit()
+        return created
+
+    def get_many(
+        self, ids: Sequence[str], batch_size: Optional[int] = None
+    ) -> List[Model]:
+        """Get many objects of the model by id.
+
+        Each chunk of ids is fetched with a single IN query.
+
+        Args:
+            ids (Sequence[str]): The ids of the objects.
+            batch_size (Optional[int]): Ids per query, defaults to DATABASE_BATCH_SIZE.
+
+        Returns:
+            List[Model]: The objects found, in the order of `ids`.
+        """
+
+        found = {}
+        for chunk in chunked(ids, batch_size or settings.DATABASE_BATCH_SIZE):
+            for obj in self.db.scalars(
+                select(self.model).where(self.model.id.in_(chunk))
+            ):
+                found[obj.id] = obj
+        return [found[id] for id in ids if id in found]
+
+    def upsert_many(
+        self,
+        objs: Iterable[Union[Model, dict]],
+        update_columns: Optional[Sequence[str]] = None,
+        batch_size: Optional[int] = None,
+    ) -> List[Model]:
+        """Insert many objects, updating the rows that already exist.
+
+        Conflicts are resolved with ON CONFLICT on `upsert_keys`, one
+        transaction per chunk of `batch_size` rows. ON CONFLICT takes a
+        single target, so a row colliding only on another unique column
+        (e.g. a taken username with a new email) is not updated: the chunk
+        fails with an IntegrityError, as such a row names two different
+        existing rows.
+
+        Args:
+            objs (Iterable[Union[Model, dict]]): Objects or column values.
+            update_columns (Optional[Sequence[str]]): Columns overwritten on
+                conflict, defaults to every provided column but the keys and id.
+            batch_size (Optional[int]): Rows per chunk, defaults to DATABASE_BATCH_SIZE.
+
+        Returns:
+            List[Model]: The inserted or updated objects.
+
+        Raises:
+            IntegrityError: A row conflicts on a unique column outside `upsert_keys`.
+        """
+
+        upserted = []
+        for chunk in chunked(objs, batch_size or settings.DATABASE_BATCH_SIZE):
+            rows = [column_values(self.model, obj) for obj in chunk]
+            columns = update_columns or [
+                key
+                for key in rows[0]
+                if key not in self.upsert_keys and key not in ("id", "created_at")
+            ]
+
+            stmt = dialect_insert(self.model, self.db).values(rows)
+            set_ = {column: stmt.excluded[column] for column in columns}
+            if "updated_at" in self.model.__table__.columns:
+                set_["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(self.upsert_keys), set_=set_
+            ).returning(self.model)
+
+            chunk_objs = self.db.scalars(
+                stmt, execution_options={"populate_existing": True}
+            ).all()
+            self.db.commit()
+            for obj in chunk_objs:
+                self._invalidate(obj.id)
+            upserted.extend(chunk_objs)
+        return upserted
+
+
+class AsyncBaseRepository(Generic[Model]):
+    """
+    Async base repository class for CRUD operations.
+    This class mirrors BaseRepository for use with an AsyncSession, so that
+    database calls do not block the event loop.
+    Attributes:
+        model (Type[Model]): The SQLAlchemy model class.
+        db (AsyncSession): The SQLAlchemy async session.
+        identity_cache (Optional[IdentityCache]): Cache invalidated on update and delete.
+    """
+
+    identity_cache: Optional[IdentityCache] = None
+
+    def __init__(self, model: Type[Model], db: AsyncSession):
+        self.model = model
+        self.db = db
+
+    def _invalidate(self, id: str) -> None:
+        """Drop a written object from the identity cache, if one is attached"""
+
+        if self.identity_cache is not None:
+            self.identity_cache.invalidate(id)
+
+    async def create(self, obj: Model) -> Model:
+        """Create a new object of the model with a single INSERT ... RETURNING.
+        Needs a session made with expire_on_commit=False, see BaseRepository.create.
+        Args:
+            obj (Model): The object to be created.
+        Returns:
+            Model: The created object, as loaded from the RETURNING clause.
+        """
+
+        result = await self.db.scalars(
+            insert(self.model).returning(self.model), [column_values(self.model, obj)]
+        )
+        created = result.one()
+        await self.db.commit()
+        return created
+
+    async def create_if_absent(self, obj: Model) -> Optional[Model]:
+        """Create a new object unless it conflicts with a unique constraint.
+        Args:
+            obj (Model): The object to be created.
+        Returns:
+            Optional[Model]: The created object, None if a conflicting row exists.
+        """
+
+        result = await self.db.scalars(
+            dialect_insert(self.model, self.db)
+            .values(**column_values(self.model, obj))
+            .on_conflict_do_nothing()
+            .returning(self.model)
+        )
+        created = result.one_or_none()
+        await self.db.commit()
+        return created
+
+    async def get(self, id: str) -> Optional[Model]:
+        """Get an object of the model by id.
+        Args:
+            id (str): The id of the object.
+        Returns:
+            Optional[Model]: The object if found, None otherwise.
+        """
+
+        return await self.db.scalar(select(self.model).where(self.model.id == id))
+
+    async def get_all(self) -> List[Model]:
+        """Get all objects of the model.
+
+        Returns:
+            List[Model]: A list containing all objects of the model in the database.
+        """
+
+        result = await self.db.scalars(select(self.model))
+        return list(result.all())
+
+    async def update(self, obj: Model) -> Model:
+        """Update an existing object of the model.
+
+        Args:
+            obj (Model): The object containing updated data.
+
+        Returns:
+            Model: The updated object if successful, None if the object wasn't found.
+        """
+
+        existing_obj = await self.get(obj.id)
+        if existing_obj:
+            for key, value in obj.__dict__.items():
+                if key == "_sa_instance_state":
+                    continue
+                setattr(existing_obj, key, value)
+            await self.db.commit()
+            self._invalidate(existing_obj.id)
+            await self.db.refresh(existing_obj)
+            return existing_obj
+        return None
+
+    async def delete(self, id: str) -> bool:
+        """Delete an object of the model by id.
+
+        Args:
+            id (str): The id of the object to delete.
+
+        Returns:
+            bool: True if the object was successfully deleted, False if the object wasn't found.
+        """
+
+        obj = await self.get(id)
+        if obj:
+            await self.db.delete(obj)
+            await self.db.commit()
+            self._invalidate(id)
             return True
         return False
 
+    async def update_fields(self, id: str, **changes) -> Optional[Model]:
+        """Update only the given columns of an object with a single statement.
+
+        Args:
+            id (str): The id of the object to update.
+            **changes: Column names and their new values.
+
+        Returns:
+            Optional[Model]: The updated object, None if it wasn't found.
+        """
+
+        result = await self.db.scalars(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**changes)
+            .returning(self.model),
+            execution_options={"populate_existing": True},
+        )
+        updated = result.one_or_none()
+        await self.db.commit()
+        if updated is not None:
+            self._invalidate(id)
+        return updated
+
+    async def delete_by_id(self, id: str) -> bool:
+        """Delete an object of the model by id with a single DELETE statement.
+
+        Args:
+            id (str): The id of the object to delete.
+
+        Returns:
+            bool: True if a row was deleted, False if the object wasn't found.
+        """
+
+        result = await self.db.execute(delete(self.model).where(self.model.id == id))
+        await self.db.commit()
+        if result.rowcount:
+            self._invalidate(id)
+        return bool(result.rowcount)
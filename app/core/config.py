@@ -15,6 +15,41 @@ class Settings(BaseSettings):
     ENVIRONMENT: str
     ACCESS_TOKEN_EXPIRY: int
     REFRESH_TOKEN_EXPIRY: int
+    JWT_CACHE_SIZE: int = 10_000
+
+    # Token signing. HMAC algorithms sign with SECRET_KEY, asymmetric ones
+    # (ES256, EdDSA, RS256...) with JWT_PRIVATE_KEY_PATH, tagging tokens
+    # with JWT_KEY_ID. JWT_PUBLIC_KEYS maps the kids of rotated keys to
+    # their public key files. JWT_BACKEND is "jose" or "pyjwt"
+    JWT_BACKEND: str = "jose"
+    JWT_PRIVATE_KEY_PATH: str = ""
+    JWT_KEY_ID: str = ""
+    JWT_PUBLIC_KEYS: dict[str, str] = {}
+
+    # Stateless auth embeds the user claims in access tokens so that
+    # get_current_user does not query the database
+    AUTH_STATELESS: bool = False
+    REVOCATION_REFRESH_INTERVAL: float = 30.0
+    REVOCATION_FILTER_BITS: int = 1 << 20
+    REVOCATION_FILTER_HASHES: int = 7
+
+    # Identity cache for get_current_user, set IDENTITY_CACHE_CHANNEL_DIR
+    # to share invalidations between the workers on a host
+    IDENTITY_CACHE_SIZE: int = 10_000
+    IDENTITY_CACHE_TTL: float = 30.0
+    IDENTITY_CACHE_CHANNEL_DIR: str = ""
+
+    # Login throttling. After LOGIN_FAILURE_THRESHOLD failed logins an
+    # account is blocked with exponential backoff; the count halves every
+    # LOGIN_FAILURE_HALF_LIFE seconds. Unknown emails are remembered for
+    # UNKNOWN_EMAIL_CACHE_TTL seconds to skip the database lookup
+    LOGIN_FAILURE_THRESHOLD: int = 5
+    LOGIN_FAILURE_HALF_LIFE: float = 300.0
+    LOGIN_BACKOFF_BASE: float = 1.0
+    LOGIN_BACKOFF_MAX: float = 900.0
+    LOGIN_TRACKER_SIZE: int = 100_000
+    UNKNOWN_EMAIL_CACHE_SIZE: int = 10_000
+    UNKNOWN_EMAIL_CACHE_TTL: float = 10.0
 
     # Database configurations
     DATABASE_HOST: str
@@ -23,17 +58,139 @@ class Settings(BaseSettings):
     DATABASE_PASSWORD: str
     DATABASE_NAME: str
     DATABASE_TYPE: str
+    DATABASE_BATCH_SIZE: int = 1000
+    # Full URL overriding the settings above, e.g. sqlite:///bench.db
+    DATABASE_URL: str = ""
+    # Read replicas used by get_read_db, a replica failing is skipped for
+    # DATABASE_REPLICA_EJECT_SECONDS
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_EJECT_SECONDS: float = 30.0
+
+    # Connection pool, per worker. A non zero DATABASE_CONNECTION_BUDGET
+    # is split between the web_concurrency workers instead
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_CONNECTION_BUDGET: int = 0
+    # Connections opened by each worker at startup, capped by the pool size
+    DATABASE_POOL_WARMUP: int = 0
+
+    # Async database stack, DATABASE_ASYNC switches the auth routes and
+    # get_current_user to AsyncSession based versions. The async URL is
+    # database_url with DATABASE_ASYNC_DRIVER, aiosqlite for SQLite
+    DATABASE_ASYNC: bool = False
+    DATABASE_ASYNC_DRIVER: str = "asyncpg"
+
+    # Password hashing executor of each web worker, 0 workers shares the
+    # CPUs between the web_concurrency workers
+    PASSWORD_HASHING_WORKERS: int = 0
+    PASSWORD_HASHING_QUEUE_SIZE: int = 64
+    # bcrypt cost. PASSWORD_HASH_ROUNDS fixes it; otherwise a non zero
+    # PASSWORD_HASH_TARGET_MS calibrates it at startup, within the bounds.
+    # Hashes of another cost are replaced on the next successful login
+    PASSWORD_HASH_ROUNDS: int = 0
+    PASSWORD_HASH_TARGET_MS: float = 0.0
+    PASSWORD_HASH_MIN_ROUNDS: int = 10
+    PASSWORD_HASH_MAX_ROUNDS: int = 16
+
+    # Rate limiting. Use a sqlite:///<path> storage URI to share the
+    # counters between the workers of a host
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
+    RATE_LIMIT_STRATEGY: str = "sliding-window-counter"
+    RATE_LIMIT_DEFAULT: str = "5/minute"
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_REGISTER: str = "5/minute"
+
+    # Logging. LOG_QUEUE moves file and console writes to a listener
+    # thread; LOG_SAMPLE_RATES maps a level name or a record's sample_key
+    # to the fraction of records kept, e.g. {"validation": 0.1}
+    LOG_QUEUE: bool = False
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_JSON: bool = False
+    LOG_SAMPLE_RATES: dict[str, float] = {}
+
+    # Request metrics, served at /metrics to callers sending INTERNAL_API_KEY.
+    # Set METRICS_MULTIPROC_DIR to aggregate all workers
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: str = ""
+    METRICS_FLUSH_INTERVAL: float = 5.0
+
+    # SQL statements. SQL_SERVER_TIMING sends the query count and time of
+    # each request in a Server-Timing header; statements slower than
+    # SLOW_QUERY_SECONDS are logged without their parameters (0 disables)
+    SQL_SERVER_TIMING: bool = False
+    SLOW_QUERY_SECONDS: float = 0.5
+
+    # Request profiling, triggered by `X-Profile: 1` with a valid
+    # X-Internal-Key or for a random PROFILING_SAMPLE_RATE of the requests.
+    # PROFILING_DIR keeps at most PROFILING_MAX_BYTES of profiles
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL: float = 0.005
+    PROFILING_DIR: str = os.path.join(BASE_DIR, "profiles")
+    PROFILING_MAX_BYTES: int = 50 * 1024 * 1024
+
+    # Server started by `python -m app.server`. WEB_CONCURRENCY workers
+    # (0 for one per CPU) are restarted after SERVER_MAX_REQUESTS requests
+    # plus up to SERVER_MAX_REQUESTS_JITTER (0 never restarts them);
+    # SERVER_LIMIT_CONCURRENCY caps the connections of a worker (0 for none)
+    WEB_CONCURRENCY: int = 0
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_TIMEOUT: int = 5
+    SERVER_LIMIT_CONCURRENCY: int = 0
+    SERVER_MAX_REQUESTS: int = 0
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+
+    # Serialize responses with orjson (the `speedups` extra) and render
+    # returned response models without validating them a second time
+    FAST_JSON: bool = False
+
+    # HTTP caching. HTTP_CACHE_MAX_AGE lets caches reuse anonymous
+    # responses without revalidating them; anonymous responses are kept
+    # rendered in memory for RESPONSE_CACHE_TTL seconds (0 disables)
+    HTTP_CACHE_MAX_AGE: int = 0
+    RESPONSE_CACHE_TTL: float = 0.0
+    RESPONSE_CACHE_SIZE: int = 256
+
+    # Key expected in the X-Internal-Key header by internal endpoints,
+    # which are disabled while it is empty
+    INTERNAL_API_KEY: str = ""
 
     # Directories
     MEDIA_DIR: str = os.path.join(BASE_DIR, "media")
     STATIC_DIR: str = os.path.join(BASE_DIR, "static")
     TEMPLATES_DIR: str = os.path.join(BASE_DIR, "templates")
 
+    @property
+    def web_concurrency(self) -> int:
+        """Number of server workers, one per CPU unless WEB_CONCURRENCY is set"""
+        return self.WEB_CONCURRENCY or os.cpu_count() or 1
+
     @property
     def database_url(self) -> str:
         """Dynamically construct DATABASE_URL"""
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return f"{self.DATABASE_TYPE}://{self.DATABASE_USER}:{self.DATABASE_PASSWORD}@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
 
+    @property
+    def async_database_url(self) -> str:
+        """database_url, DATABASE_URL included, with the async driver"""
+        from sqlalchemy.engine import make_url
+
+        url = make_url(self.database_url)
+        backend = url.get_backend_name()
+        driver = "aiosqlite" if backend == "sqlite" else self.DATABASE_ASYNC_DRIVER
+        return url.set(drivername=f"{backend}+{driver}").render_as_string(
+            hide_password=False
+        )
+
     class Config:
         env_file = ".env"
 
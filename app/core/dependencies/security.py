@@ -1,32 +1,63 @@
-from fastapi.security import OAuth2PasswordBearer
+import hmac
+
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
 from app.api.models.user import User
-from app.db.database import get_db
-from app.utils.jwt_helpers import verify_jwt_token
+from app.db.database import get_read_db, async_get_db
+from app.utils.jwt_helpers import decode_jwt_token
+from app.utils.revocation import revocation_filter
+from app.utils.identity_cache import UserIdentity, identity_cache
 from app.core import response_messages
+from app.core.config import settings
 
 
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+internal_key_scheme = APIKeyHeader(name="X-Internal-Key", auto_error=False)
+
+
+def require_internal_key(
+    internal_key: Annotated[str, Depends(internal_key_scheme)],
+) -> None:
+    """Dependency restricting internal endpoints to callers with INTERNAL_API_KEY
+
+    Internal endpoints respond with 404 while no key is configured.
+    """
+
+    if not settings.INTERNAL_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not internal_key or not hmac.compare_digest(
+        internal_key, settings.INTERNAL_API_KEY
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=response_messages.INVALID_CREDENTIALS,
+        )
 
 
 def get_current_user(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     access_token: Annotated[str, Depends(oauth_scheme)],
-) -> User:
+) -> UserIdentity:
     """Dependency to get current logged in user
     Useful for protecting routes and restricting their access to only
-    authenticated users
+    authenticated users. Users are served from the identity cache when
+    possible, so repeat requests skip the database. In stateless auth mode
+    the user is built from the token claims and the database is only
+    consulted to confirm a possible revocation.
 
     Args:
         db (Annotated[Session, Depends): Database Session
         access_token (Annotated[str, Depends): JWT access token
 
     Returns:
-        User: Logged in User object
+        UserIdentity: Snapshot of the logged in User
     """
 
     credentials_exception = HTTPException(
@@ -35,13 +66,71 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    user_id = verify_jwt_token(
+    payload = decode_jwt_token(
         token=access_token, credentials_exception=credentials_exception
     )
 
+    if revocation_filter.is_revoked(db, payload):
+        raise credentials_exception
+
+    if settings.AUTH_STATELESS and "username" in payload:
+        return UserIdentity.from_claims(payload)
+
+    user_id = payload["user_id"]
+
+    identity = identity_cache.get(user_id)
+    if identity is not None:
+        return identity
+
     user = db.query(User).filter(User.id == user_id).first()
 
     if not user:
         raise credentials_exception
 
-    return user
+    return identity_cache.put(user)
+
+
+async def async_get_current_user(
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+    access_token: Annotated[str, Depends(oauth_scheme)],
+) -> UserIdentity:
+    """Async version of get_current_user for the async database stack
+
+    Args:
+        db (Annotated[AsyncSession, Depends): Async database Session
+        access_token (Annotated[str, Depends): JWT access token
+
+    Returns:
+        UserIdentity: Snapshot of the logged in User
+    """
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=response_messages.INVALID_CREDENTIALS,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    payload = decode_jwt_token(
+        token=access_token, credentials_exception=credentials_exception
+    )
+
+    if revocation_filter.might_be_revoked(payload) and await db.run_sync(
+        revocation_filter.is_revoked, payload
+    ):
+        raise credentials_exception
+
+    if settings.AUTH_STATELESS and "username" in payload:
+        return UserIdentity.from_claims(payload)
+
+    user_id = payload["user_id"]
+
+    identity = identity_cache.get(user_id)
+    if identity is not None:
+        return identity
+
+    user = await db.scalar(select(User).where(User.id == user_id))
+
+    if not user:
+        raise credentials_exception
+
+    return identity_cache.put(user)
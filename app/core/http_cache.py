@@ -0,0 +1,131 @@
+"""ETags and conditional GET responses
+
+GET endpoints send a strong ETag with Cache-Control, and answer a request
+whose If-None-Match lists that ETag with an empty 304. When the ETag can
+be derived from what the response depends on (e.g. the user's id and
+updated_at), the body isn't even rendered. Anonymous endpoints hash their
+rendered body instead, and keep it in memory for RESPONSE_CACHE_TTL
+seconds so repeat requests skip rendering and hashing.
+"""
+
+import hashlib
+from typing import Any, Callable, Optional
+
+from fastapi import Request, status
+from fastapi.responses import Response
+
+from app.core.config import settings
+from app.core.responses import JSONResponseClass
+from app.utils.cache import TTLCache
+
+
+def strong_etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+
+def etag_from(*parts: Any) -> str:
+    """Strong ETag of the values a response is rendered from"""
+
+    return strong_etag("\0".join(map(str, parts)).encode())
+
+
+def identity_etag(identity, *parts: Any) -> str:
+    """ETag of a response showing a user, derived from its id and updated_at
+
+    Identities built from stateless token claims have no updated_at, their
+    username and email are used instead.
+    """
+
+    if identity.updated_at is not None:
+        version = (identity.updated_at.isoformat(),)
+    else:
+        version = (identity.username, identity.email)
+    return etag_from(identity.id, *version, *parts)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag, compared weakly"""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str, private: bool) -> dict:
+    """Validation headers of a response
+
+    Private responses depend on the Authorization header and must not be
+    stored by shared caches. Both are revalidated before reuse, unless
+    HTTP_CACHE_MAX_AGE allows caches to reuse anonymous ones for a while.
+    """
+
+    if private:
+        return {
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+            "Vary": "Authorization",
+        }
+    max_age = settings.HTTP_CACHE_MAX_AGE
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}" if max_age else "public, no-cache",
+    }
+
+
+def conditional_response(
+    request: Request, etag: str, render: Callable[[], Response], private: bool = True
+) -> Response:
+    """304 when the client has the current version, the rendered response otherwise
+
+    Args:
+        request (Request): The request, for its If-None-Match header.
+        etag (str): ETag of the current version of the response.
+        render (Callable[[], Response]): Renders the response, only called
+            when the client's version is stale.
+        private (bool): Whether the response depends on the caller.
+    """
+
+    headers = cache_headers(etag, private)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response = render()
+    response.headers.update(headers)
+    return response
+
+
+# Rendered anonymous responses, as (body, etag) by URL
+response_cache = TTLCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE if settings.RESPONSE_CACHE_TTL else 0,
+    ttl=settings.RESPONSE_CACHE_TTL,
+)
+
+
+def anonymous_response(request: Request, content: Callable[[], Any]) -> Response:
+    """JSON response with a body ETag, for endpoints answering all callers alike
+
+    Args:
+        request (Request): The request, for its URL and If-None-Match header.
+        content (Callable[[], Any]): Builds the JSON content, not called
+            while the rendered response is cached.
+    """
+
+    key = str(request.url)
+    entry = response_cache.get(key)
+    if entry is None:
+        body = JSONResponseClass(content=content()).body
+        entry = (body, strong_etag(body))
+        response_cache.set(key, entry)
+
+    body, etag = entry
+    return conditional_response(
+        request,
+        etag,
+        lambda: Response(body, media_type="application/json"),
+        private=False,
+    )
@@ -0,0 +1,290 @@
+"""Request metrics middleware and Prometheus text exposition"""
+
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.core.config import settings
+from app.utils.logger import logger
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsRegistry:
+    """Request counters and latency histograms per route.
+
+    Each thread accumulates into its own dict, so recording never takes a
+    lock; the shards are only merged when the metrics are read. A series
+    is keyed by (method, route, status class) and holds the request count,
+    the latency sum and one counter per bucket plus +Inf.
+    """
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.series
+        except AttributeError:
+            series = self._local.series = {}
+            with self._shards_lock:
+                self._shards.append(series)
+            return series
+
+    def observe(self, method: str, route: str, status_code: int, duration: float) -> None:
+        series = self._shard()
+        key = (method, route, f"{status_code // 100}xx")
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = [0, 0.0] + [0] * (len(self.buckets) + 1)
+        entry[0] += 1
+        entry[1] += duration
+        entry[2 + bisect_left(self.buckets, duration)] += 1
+
+    def snapshot(self) -> dict:
+        """Merge the per-thread shards into one series dict"""
+
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        merged: dict = {}
+        for shard in shards:
+            for key, entry in list(shard.items()):
+                _merge_entry(merged, key, entry)
+        return merged
+
+    def clear(self) -> None:
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+def _merge_entry(series: dict, key: tuple, entry: list) -> None:
+    total = series.get(key)
+    if total is None:
+        series[key] = list(entry)
+    else:
+        for i, value in enumerate(entry):
+            total[i] += value
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording the latency and status of each request.
+
+    Requests are labelled with the templated route path (e.g.
+    /api/v1/users/{id}) rather than the raw URL to bound cardinality.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.observe(
+                scope["method"],
+                _route_label(scope),
+                status_code,
+                time.perf_counter() - start,
+            )
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Plain starlette routes (docs, openapi) have fixed paths
+    if scope.get("endpoint") is not None:
+        return scope["path"]
+    return UNMATCHED_ROUTE
+
+
+# Totals of the workers that exited, so the sums never go backwards
+ARCHIVE_NAME = "metrics-archive.json"
+
+# Set once this worker's totals are archived, it writes no snapshot after
+_archived = False
+
+
+def _snapshot_path(directory: str, pid: Optional[int] = None) -> Path:
+    return Path(directory) / f"metrics-{pid or os.getpid()}.json"
+
+
+@contextmanager
+def _directory_lock(directory: str) -> Iterator[None]:
+    """Exclusive lock over the snapshots of METRICS_MULTIPROC_DIR"""
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    with open(Path(directory) / "metrics.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _read_series(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    series: dict = {}
+    for method, route, status, entry in data:
+        _merge_entry(series, (method, route, status), entry)
+    return series
+
+
+def _write_series(path: Path, series: dict) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    data = [list(key) + [entry] for key, entry in series.items()]
+    tmp_path.write_text(json.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def _archive(directory: str, series: dict, snapshot: Path) -> None:
+    """Add an exited worker's totals to the archive, the lock must be held"""
+
+    archive_path = Path(directory) / ARCHIVE_NAME
+    archive = _read_series(archive_path)
+    for key, entry in series.items():
+        _merge_entry(archive, key, entry)
+    _write_series(archive_path, archive)
+    snapshot.unlink(missing_ok=True)
+
+
+def write_snapshot(registry: MetricsRegistry = metrics) -> None:
+    """Write this worker's metrics to METRICS_MULTIPROC_DIR"""
+
+    directory = settings.METRICS_MULTIPROC_DIR
+    with _directory_lock(directory):
+        if not _archived:
+            _write_series(_snapshot_path(directory), registry.snapshot())
+
+
+def archive_snapshot(registry: MetricsRegistry = metrics) -> None:
+    """Move this worker's totals to the archive, called when it exits
+
+    Like prometheus_client's multiprocess mode, the counters of exited
+    workers keep counting in the sums, so Prometheus sees no reset when
+    workers are recycled. Clear the directory between deployments.
+    """
+    global _archived
+
+    directory = settings.METRICS_MULTIPROC_DIR
+    with _directory_lock(directory):
+        _archive(directory, registry.snapshot(), _snapshot_path(directory))
+        _archived = True
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect(registry: MetricsRegistry = metrics) -> dict:
+    """Metrics of this worker merged with the snapshots of the others
+
+    Snapshots of workers that are no longer running, e.g. killed before
+    they could archive theirs, are moved to the archive first.
+    """
+
+    series = registry.snapshot()
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return series
+
+    own_path = _snapshot_path(directory)
+    with _directory_lock(directory):
+        for path in Path(directory).glob("metrics-*.json"):
+            pid = path.stem.removeprefix("metrics-")
+            if pid.isdigit() and not _is_running(int(pid)):
+                _archive(directory, _read_series(path), path)
+
+        for path in Path(directory).glob("metrics-*.json"):
+            if path == own_path:
+                continue
+            for key, entry in _read_series(path).items():
+                _merge_entry(series, key, entry)
+    return series
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def render_prometheus(registry: MetricsRegistry = metrics) -> str:
+    """Render the metrics in the Prometheus text exposition format"""
+
+    series = collect(registry)
+    lines = [
+        "# HELP http_requests_total Total HTTP requests by route and status class.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route, status), entry in sorted(series.items()):
+        labels = _labels(method=method, route=route, status=status)
+        lines.append(f"http_requests_total{{{labels}}} {entry[0]}")
+
+    lines += [
+        "# HELP http_request_duration_seconds HTTP request latency by route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route, status), entry in sorted(series.items()):
+        labels = _labels(method=method, route=route, status=status)
+        cumulative = 0
+        for bound, count in zip(registry.buckets + ("+Inf",), entry[2:]):
+            cumulative += count
+            lines.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+        lines.append(f"http_request_duration_seconds_sum{{{labels}}} {entry[1]}")
+        lines.append(f"http_request_duration_seconds_count{{{labels}}} {entry[0]}")
+
+    return "\n".join(lines) + "\n"
+
+
+async def flush_metrics_periodically() -> None:
+    """Write this worker's snapshot every METRICS_FLUSH_INTERVAL seconds
+
+    Meant to run as a background task when METRICS_MULTIPROC_DIR is set, so
+    any worker answering /metrics can report the others too.
+    """
+
+    while True:
+        try:
+            await asyncio.to_thread(write_snapshot)
+        except Exception as e:
+            logger.error(f"Writing metrics snapshot failed: {e}")
+        await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
@@ -0,0 +1,211 @@
+"""On-demand CPU profiling of single requests
+
+When PROFILING_ENABLED is set, ProfilingMiddleware profiles the requests
+sent with an `X-Profile: 1` header and a valid `X-Internal-Key`, plus a
+random PROFILING_SAMPLE_RATE fraction of all requests. While a request
+runs, a sampler thread records the stacks of the busy threads every
+PROFILING_INTERVAL seconds. The stacks are written to PROFILING_DIR in the
+collapsed format read by flamegraph.pl and speedscope, one file per
+request, and the oldest files are removed once the directory grows past
+PROFILING_MAX_BYTES.
+
+Only one request is profiled at a time per worker. The event loop and
+the threadpool are shared, so stacks of concurrent requests show up in
+the profile too.
+"""
+
+import asyncio
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.logger import logger
+
+# Leaf frames of threads waiting for work or I/O, which use no CPU
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("selectors.py", "select"),
+}
+
+
+class StackSampler:
+    """Thread counting the stacks of the other threads at a fixed interval
+
+    Args:
+        interval (float): Seconds between two samples.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._labels: dict = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Stop sampling
+
+        Returns:
+            Counter: Number of samples per collapsed stack.
+        """
+
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id and not _is_idle(frame):
+                    self.counts[self._collapse(frame)] += 1
+
+    def _collapse(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(code)
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    # Paths relative to the longest matching import root
+    for root in sorted(map(os.path.abspath, sys.path), key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            filename = filename[len(root) + 1 :]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def profile_name(method: str, path: str) -> str:
+    """File name of a request profile, unique and sortable by time"""
+
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+    return (
+        f"{time.strftime('%Y%m%dT%H%M%S')}-{method}-{slug}"
+        f"-{os.getpid()}-{random.getrandbits(32):08x}.collapsed"
+    )
+
+
+def write_profile(directory: str, name: str, counts: Counter) -> Path:
+    """Write the collapsed stacks of a profile, one `stack count` line each"""
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    path = Path(directory) / name
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in counts.items()))
+    return path
+
+
+def enforce_retention(directory: str, max_bytes: int) -> None:
+    """Remove the oldest profiles until the directory fits in `max_bytes`"""
+
+    profiles = []
+    for path in Path(directory).glob("*.collapsed"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        profiles.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in profiles)
+    for _, size, path in sorted(profiles):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling requests on demand, see the module docstring"""
+
+    def __init__(
+        self,
+        app,
+        directory: str = settings.PROFILING_DIR,
+        sample_rate: float = settings.PROFILING_SAMPLE_RATE,
+        interval: float = settings.PROFILING_INTERVAL,
+        max_bytes: int = settings.PROFILING_MAX_BYTES,
+    ):
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._busy = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        internal_key = _header(scope, b"x-internal-key")
+        return (
+            _header(scope, b"x-profile") == "1"
+            and bool(settings.INTERNAL_API_KEY)
+            and internal_key is not None
+            and hmac.compare_digest(internal_key, settings.INTERNAL_API_KEY)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = self._requested(scope)
+        if not (
+            requested or random.random() < self.sample_rate
+        ) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        name = profile_name(scope["method"], scope["path"])
+
+        async def send_with_profile_name(message):
+            # Only callers asking for the profile learn where it is
+            if requested and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile", name.encode())
+                ]
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_name)
+        finally:
+            counts = sampler.stop()
+            self._busy.release()
+            try:
+                await asyncio.to_thread(self._store, name, counts)
+            except OSError as e:
+                logger.error(f"Could not write profile {name}: {e}")
+
+    def _store(self, name: str, counts: Counter) -> None:
+        write_profile(self.directory, name, counts)
+        enforce_retention(self.directory, self.max_bytes)
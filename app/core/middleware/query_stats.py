@@ -0,0 +1,36 @@
+"""Server-Timing header with the SQL statements of each request"""
+
+from app.db.instrumentation import QueryStats, count_queries
+
+
+def server_timing(stats: QueryStats) -> str:
+    """Server-Timing header value of the statements of a request"""
+
+    return f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware counting the statements of each request
+
+    The count and total time of the statements executed before the
+    response starts are sent in a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as stats:
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", server_timing(stats).encode())
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
@@ -0,0 +1,179 @@
+"""Rate limiter and its shared storage backend"""
+
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+from typing import Optional
+from urllib.parse import urlparse
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from app.core.config import settings
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit storage shared by the workers of a host through SQLite in WAL mode.
+
+    Each limit keeps two fixed-window counters (current and previous
+    window) per client, so checking a sliding window is O(1). Expired
+    counters are evicted every `eviction_interval` seconds, which keeps the
+    table bounded by the number of clients active in the last window.
+
+    Usage: storage_uri="sqlite:////var/run/app/ratelimit.db"
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(
+        self,
+        uri: str,
+        wrap_exceptions: bool = False,
+        eviction_interval: float = 60.0,
+        **options,
+    ):
+        # As with SQLAlchemy, sqlite:///ratelimit.db is relative to the
+        # working directory and sqlite:////var/run/ratelimit.db absolute
+        self.path = urlparse(uri).path[1:] or ":memory:"
+        self.eviction_interval = float(eviction_interval)
+        self._next_eviction = 0.0
+        self._local = threading.local()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared between threads or forked processes
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits "
+                "(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        if now >= self._next_eviction:
+            self._next_eviction = now + self.eviction_interval
+            connection.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+
+    def _incr(
+        self,
+        connection: sqlite3.Connection,
+        key: str,
+        expiry: float,
+        now: float,
+        elastic_expiry: bool = False,
+        amount: int = 1,
+    ) -> int:
+        return connection.execute(
+            """
+            INSERT INTO rate_limits (key, count, expires_at) VALUES (?1, ?2, ?3)
+            ON CONFLICT (key) DO UPDATE SET
+                count = CASE WHEN expires_at <= ?4 THEN ?2 ELSE count + ?2 END,
+                expires_at = CASE WHEN expires_at <= ?4 OR ?5 THEN ?3 ELSE expires_at END
+            RETURNING count
+            """,
+            (key, amount, now + expiry, now, elastic_expiry),
+        ).fetchone()[0]
+
+    def _get(self, connection: sqlite3.Connection, key: str, now: float) -> int:
+        row = connection.execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def incr(
+        self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1
+    ) -> int:
+        connection = self._connection()
+        now = time.time()
+        self._evict(connection, now)
+        return self._incr(connection, key, expiry, now, elastic_expiry, amount)
+
+    def get(self, key: str) -> int:
+        return self._get(self._connection(), key, time.time())
+
+    def get_expiry(self, key: str) -> float:
+        row = self._connection().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self._connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def _sliding_window(
+        self, connection: sqlite3.Connection, key: str, expiry: int, now: float
+    ) -> tuple[int, float, int, float]:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(connection, previous_key, now)
+        current_count = self._get(connection, current_key, now)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(
+        self, key: str, limit: int, expiry: int, amount: int = 1
+    ) -> bool:
+        if amount > limit:
+            return False
+
+        connection = self._connection()
+        now = time.time()
+        self._evict(connection, now)
+
+        # The write lock serializes the check and the increment across workers
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(
+                connection, key, expiry, now
+            )
+            weighted_count = previous_count * previous_ttl / expiry + current_count
+            if floor(weighted_count) + amount > limit:
+                return False
+
+            # The current window is read as the previous one by the next window
+            _, current_key = self.sliding_window_keys(key, expiry, now)
+            self._incr(connection, current_key, 2 * expiry, now, amount=amount)
+            return True
+        finally:
+            connection.execute("COMMIT")
+
+    def get_sliding_window(
+        self, key: str, expiry: int
+    ) -> tuple[int, float, int, float]:
+        return self._sliding_window(self._connection(), key, expiry, time.time())
+
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    enabled=settings.RATE_LIMIT_ENABLED,
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+)
@@ -1,8 +1,12 @@
 REGISTER_SUCCESSFUL = "User regristration successful"
 EMAIL_ALREADY_EXISTS = "User with this email already exists"
+USER_ALREADY_EXISTS = "User with this email or username already exists"
 INVALID_EMAIL = "User with the email does not exist"
 INVALID_PASSWORD = "Wrong user password"
+INVALID_LOGIN = "Invalid email or password"
+TOO_MANY_LOGIN_ATTEMPTS = "Too many failed login attempts, please try again later"
 
 INVALID_CREDENTIALS = "Could not validate credentials"
 EXPIRED_REFRESH_TOKEN = "Refresh token expired"
 TOKEN_REFRESH_SUCCESSFUL = "Tokens refreshed succesfully"
+HASHING_UNAVAILABLE = "Server is busy, please try again shortly"
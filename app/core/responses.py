@@ -0,0 +1,93 @@
+"""JSON response classes and the opt-in fast serialization path
+
+With FAST_JSON enabled, responses are encoded with orjson (when the
+`speedups` extra is installed) and routes using ModelJSONRoute serialize
+a returned response model straight to bytes with its pydantic-core
+serializer, instead of validating it again against `response_model` and
+going through `jsonable_encoder` and the stdlib json encoder.
+"""
+
+import asyncio
+import functools
+from typing import Any, Callable
+
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401
+except ImportError:  # pragma: no cover - orjson is an optional extra
+    ORJSONResponse = None
+
+
+# Response class of the app and its exception handlers
+JSONResponseClass = (
+    ORJSONResponse if settings.FAST_JSON and ORJSONResponse is not None else JSONResponse
+)
+
+
+class ModelJSONResponse(Response):
+    """Response rendering a pydantic model in one pass with pydantic-core"""
+
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+
+
+class ModelJSONRoute(APIRoute):
+    """Route returning its response model without validating it again
+
+    When the endpoint returns an instance of exactly the declared
+    `response_model`, the instance is already valid, so it's rendered with
+    ModelJSONResponse. Anything else (dicts, subclasses, Response objects)
+    goes through the regular FastAPI serialization.
+    """
+
+    def get_route_handler(self):
+        if self._can_skip_validation():
+            self.dependant.call = _render_models(
+                self.dependant.call, self.response_model, self.status_code or 200
+            )
+        return super().get_route_handler()
+
+    def _can_skip_validation(self) -> bool:
+        return (
+            isinstance(self.response_model, type)
+            and issubclass(self.response_model, BaseModel)
+            and self.response_model_include is None
+            and self.response_model_exclude is None
+            and self.response_model_by_alias
+            and not self.response_model_exclude_unset
+            and not self.response_model_exclude_defaults
+            and not self.response_model_exclude_none
+        )
+
+
+def _render_models(call: Callable, model: type, status_code: int) -> Callable:
+    def render(result: Any) -> Any:
+        if type(result) is model:
+            return ModelJSONResponse(result, status_code=status_code)
+        return result
+
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_endpoint(*args, **kwargs):
+            return render(await call(*args, **kwargs))
+
+        return async_endpoint
+
+    @functools.wraps(call)
+    def endpoint(*args, **kwargs):
+        return render(call(*args, **kwargs))
+
+    return endpoint
+
+
+# Route class for the API routers
+route_class = ModelJSONRoute if settings.FAST_JSON else APIRoute
@@ -0,0 +1,6 @@
+"""Declarative base of the models, kept apart from the engine so importing
+the models does not build any database connection"""
+
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
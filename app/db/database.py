@@ -1,32 +1,267 @@
-"""The database module"""
+"""The database module
 
-from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
-from sqlalchemy import create_engine
+The engines and session factories are built on first use, so importing
+the app (or a model) does not load the database driver or create a pool.
+They're also available as the module attributes `engine`, `SessionLocal`,
+`async_engine` and `AsyncSessionLocal`.
+"""
+
+import threading
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
+from app.db.base import Base
+from app.db import instrumentation  # noqa: F401 - registers the engine listeners
+from app.db.pool import pool_options
+from app.db.routing import ReplicaSet, RoutingSession
+from app.db.session import RequestSession
 from app.utils.logger import logger
 
-DATABASE_URL = settings.database_url
+_engine = None
+_session_factory = None
+_replica_set = None
+_read_session_factory = None
+_async_engine = None
+_async_session_factory = None
+_lock = threading.Lock()
+
+
+def _create_engine(database_url: str) -> Engine:
+    # SQLite connections are handed between the threads of the pool
+    connect_args = (
+        {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    )
+    return create_engine(database_url, connect_args=connect_args, **pool_options())
+
+
+def get_engine() -> Engine:
+    """The engine of the primary database, created on first use"""
+    global _engine
+
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = _create_engine(settings.database_url)
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    """Factory of sessions bound to the primary engine"""
+    global _session_factory
+
+    if _session_factory is None:
+        engine = get_engine()
+        with _lock:
+            if _session_factory is None:
+                # Objects stay loaded after commit, so results of bulk writes
+                # can be read without one refresh per row
+                _session_factory = sessionmaker(
+                    autocommit=False,
+                    autoflush=False,
+                    expire_on_commit=False,
+                    bind=engine,
+                )
+    return _session_factory
+
+
+def get_replica_set() -> Optional[ReplicaSet]:
+    """Engines of the read replicas, None when none is configured"""
+    global _replica_set
+
+    if _replica_set is None and settings.DATABASE_REPLICA_URLS:
+        with _lock:
+            if _replica_set is None:
+                _replica_set = ReplicaSet(
+                    [_create_engine(url) for url in settings.DATABASE_REPLICA_URLS],
+                    eject_seconds=settings.DATABASE_REPLICA_EJECT_SECONDS,
+                )
+    return _replica_set
+
+
+def get_read_session_factory() -> sessionmaker:
+    """Factory of sessions routing their reads to the replicas"""
+    global _read_session_factory
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db_session = scoped_session(SessionLocal)
+    if _read_session_factory is None:
+        engine = get_engine()
+        replicas = get_replica_set()
+        with _lock:
+            if _read_session_factory is None:
+                _read_session_factory = sessionmaker(
+                    class_=RoutingSession,
+                    replicas=replicas,
+                    autocommit=False,
+                    autoflush=False,
+                    expire_on_commit=False,
+                    bind=engine,
+                )
+    return _read_session_factory
 
-Base = declarative_base()
+
+def get_async_engine() -> Optional[AsyncEngine]:
+    """The async engine, None unless DATABASE_ASYNC is enabled
+
+    The async stack is only built when enabled, so the async driver does
+    not have to be installed for the sync deployment.
+    """
+    global _async_engine
+
+    if _async_engine is None and settings.DATABASE_ASYNC:
+        with _lock:
+            if _async_engine is None:
+                _async_engine = create_async_engine(
+                    settings.async_database_url, **pool_options(async_engine=True)
+                )
+    return _async_engine
+
+
+def get_async_session_factory() -> Optional[async_sessionmaker]:
+    global _async_session_factory
+
+    if _async_session_factory is None and settings.DATABASE_ASYNC:
+        async_engine = get_async_engine()
+        with _lock:
+            if _async_session_factory is None:
+                _async_session_factory = async_sessionmaker(
+                    bind=async_engine, autoflush=False, expire_on_commit=False
+                )
+    return _async_session_factory
+
+
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "SessionLocal": get_session_factory,
+    "async_engine": get_async_engine,
+    "AsyncSessionLocal": get_async_session_factory,
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def init_db():
     """Initialize the database by creating all tables defined by Base metadata."""
-    return Base.metadata.create_all(bind=engine)
+    return Base.metadata.create_all(bind=get_engine())
+
+
+def warm_up_pool(connections: int) -> int:
+    """Open pool connections ahead of the first requests
+
+    Args:
+        connections (int): Connections to open, capped by the pool size.
+
+    Returns:
+        int: The number of connections opened.
+    """
+
+    engine = get_engine()
+    opened = []
+    try:
+        for _ in range(min(connections, engine.pool.size())):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        # Closing returns the connections to the pool, which keeps them open
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+async def async_warm_up_pool(connections: int) -> int:
+    """Open async pool connections ahead of the first requests"""
+
+    async_engine = get_async_engine()
+    opened = []
+    try:
+        for _ in range(min(connections, async_engine.pool.size())):
+            connection = await async_engine.connect()
+            opened.append(connection)
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            await connection.close()
+    return len(opened)
+
+
+async def async_dispose_engine() -> None:
+    """Close the async pool's connections, called at shutdown
+
+    aiosqlite runs each connection in a non-daemon thread, which would
+    otherwise keep the process alive after the app has stopped.
+    """
+
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+def pool_stats() -> dict:
+    """Usage and checkout counters of every instrumented connection pool"""
+
+    async_engine = get_async_engine()
+    replicas = get_replica_set()
+    engines = {
+        "primary": get_engine(),
+        "async": async_engine and async_engine.sync_engine,
+    }
+    for index, replica in enumerate(replicas.engines if replicas else []):
+        engines[f"replica-{index}"] = replica
+    return {
+        name: db_engine.pool.snapshot()
+        for name, db_engine in engines.items()
+        if db_engine is not None and hasattr(db_engine.pool, "snapshot")
+    }
 
 
 def get_db():
-    """Yield a new database session and ensure it's closed after use."""
-    db = db_session()
+    """Yield a read-write session for the request and ensure it's closed after use.
+
+    The session is created on first use and only holds a connection from
+    its first query until its unit of work is committed. Work left
+    uncommitted by a successful request is committed at the end.
+    """
+    db = RequestSession(get_session_factory())
+    try:
+        yield db
+        db.finish()
+    except Exception as e:
+        logger.error(f"Database Error: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """Yield a read-only session for the request and ensure it's closed after use.
+
+    Its SELECTs go to a read replica, see RoutingSession. Without
+    DATABASE_REPLICA_URLS they go to the primary. Flushing or executing
+    INSERT, UPDATE or DELETE statements raises, and it's never committed.
+    """
+    db = RequestSession(get_read_session_factory(), read_only=True)
     try:
         yield db
+        db.finish()
     except Exception as e:
         logger.error(f"Database Error: {e}")
         raise
     finally:
         db.close()
+
+
+async def async_get_db():
+    """Yield a new async database session and ensure it's closed after use."""
+    async with get_async_session_factory()() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database Error: {e}")
+            raise
@@ -0,0 +1,109 @@
+"""SQL statement instrumentation
+
+Listeners on the Engine class time every statement executed by any
+engine (primary, replicas, the async engine and the ones of the tests).
+Statements slower than SLOW_QUERY_SECONDS are logged, with the types of
+their parameters instead of their values. Within `count_queries()` (used
+by QueryStatsMiddleware for each request), the statements are also
+counted in a QueryStats held by a contextvar, which the threads running
+the request's sync code share.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.utils.logger import logger
+
+
+class QueryStats:
+    """Statements executed in a request or a `count_queries()` block
+
+    Args:
+        record (bool): Whether to keep the statements themselves.
+    """
+
+    def __init__(self, record: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Optional[list[str]] = [] if record else None
+
+    def add(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def redact_parameters(parameters) -> object:
+    """The parameters of a statement with each value replaced by its type name"""
+
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return type(parameters)(redact_parameters(value) for value in parameters)
+    return type(parameters).__name__
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    now = time.perf_counter()
+    duration = now - conn.info.pop("query_started_at", now)
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.add(statement, duration)
+
+    if settings.SLOW_QUERY_SECONDS and duration >= settings.SLOW_QUERY_SECONDS:
+        logger.warning(
+            f"Slow query ({duration * 1000:.1f} ms): {statement} "
+            f"parameters={redact_parameters(parameters)}",
+            extra={"sample_key": "slow_query"},
+        )
+
+
+@contextmanager
+def count_queries(record: bool = False) -> Iterator[QueryStats]:
+    """Count the statements executed in the block, in this context"""
+
+    stats = QueryStats(record=record)
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(n: int) -> Iterator[QueryStats]:
+    """Fail when the block executes more than `n` statements
+
+    Usage:
+        with assert_max_queries(1):
+            repository.get_many(ids)
+
+    Raises:
+        AssertionError: Listing the statements, when there are more than `n`
+    """
+
+    with count_queries(record=True) as stats:
+        yield stats
+
+    if stats.count > n:
+        raise AssertionError(
+            f"{stats.count} queries executed, expected at most {n}:\n"
+            + "\n".join(stats.statements)
+        )
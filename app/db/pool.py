@@ -0,0 +1,119 @@
+"""Connection pool configuration and instrumentation"""
+
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+
+def pool_limits(workers: int, budget: int) -> tuple[int, int]:
+    """Split a connection budget between the pools of all workers
+
+    Two thirds of each worker's share are kept open in the pool and the
+    rest is allowed as overflow for bursts.
+
+    Args:
+        workers (int): Number of worker processes sharing the budget.
+        budget (int): Connections the whole deployment may open.
+
+    Returns:
+        tuple[int, int]: The pool size and max overflow for one worker.
+    """
+
+    per_worker = max(1, budget // max(1, workers))
+    pool_size = max(1, per_worker * 2 // 3)
+    return pool_size, per_worker - pool_size
+
+
+def pool_options(async_engine: bool = False) -> dict:
+    """Keyword arguments for create_engine built from the settings
+
+    When DATABASE_CONNECTION_BUDGET is set, the pool size and overflow are
+    derived from it and the number of workers instead of being used as is.
+    """
+
+    pool_size = settings.DATABASE_POOL_SIZE
+    max_overflow = settings.DATABASE_MAX_OVERFLOW
+    if settings.DATABASE_CONNECTION_BUDGET:
+        pool_size, max_overflow = pool_limits(
+            settings.web_concurrency, settings.DATABASE_CONNECTION_BUDGET
+        )
+
+    return {
+        "poolclass": (
+            InstrumentedAsyncAdaptedQueuePool if async_engine else InstrumentedQueuePool
+        ),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+
+
+class PoolStats:
+    """Counters of connection checkouts from a pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+
+class InstrumentedPoolMixin:
+    """Records how long each checkout waited and how many timed out"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start, timed_out=False)
+        return connection
+
+    def snapshot(self) -> dict:
+        """Current pool usage and the checkout counters"""
+
+        stats = self.stats
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "in_use": self.checkedout(),
+            "overflow": max(0, self.overflow()),
+            "max_overflow": self._max_overflow,
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_seconds_total": round(stats.wait_total, 6),
+            "wait_seconds_max": round(stats.wait_max, 6),
+            "wait_seconds_avg": round(
+                stats.wait_total / max(1, stats.checkouts + stats.timeouts), 6
+            ),
+        }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,118 @@
+"""Routing of read-only statements to read replicas"""
+
+import itertools
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import Select, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.utils.logger import logger
+
+
+class ReplicaSet:
+    """Read replicas picked in turn, skipping the ones that recently failed
+
+    A replica is ejected for `eject_seconds` when it reports a disconnect
+    or an operational error (e.g. refused connection), after which it's
+    tried again.
+
+    Args:
+        engines (list[Engine]): One engine per replica.
+        eject_seconds (float): How long a failing replica is skipped.
+    """
+
+    def __init__(self, engines: list[Engine], eject_seconds: float = 30.0):
+        self.engines = engines
+        self.eject_seconds = eject_seconds
+        self._ejected_until: dict[Engine, float] = {}
+        self._cycle = itertools.cycle(engines)
+        self._lock = threading.Lock()
+
+        for engine in engines:
+            event.listen(engine, "handle_error", self._on_error(engine))
+
+    def _on_error(self, engine: Engine):
+        def handle_error(context) -> None:
+            if context.is_disconnect or isinstance(
+                context.sqlalchemy_exception, OperationalError
+            ):
+                self.eject(engine)
+
+        return handle_error
+
+    def eject(self, engine: Engine) -> None:
+        with self._lock:
+            self._ejected_until[engine] = time.monotonic() + self.eject_seconds
+        logger.error(
+            f"Read replica {engine.url!r} ejected for {self.eject_seconds}s"
+        )
+
+    def is_available(self, engine: Engine) -> bool:
+        return self._ejected_until.get(engine, 0.0) <= time.monotonic()
+
+    def choose(self) -> Optional[Engine]:
+        """The next available replica, None when all of them are ejected"""
+
+        with self._lock:
+            for _ in range(len(self.engines)):
+                engine = next(self._cycle)
+                if self.is_available(engine):
+                    return engine
+        return None
+
+
+class RoutingSession(Session):
+    """Session sending plain SELECTs to a replica and everything else to the primary
+
+    A session reads from one replica for its whole life, so a unit of work
+    sees a single snapshot. When its replica refuses the connection, the
+    next one is used, or the primary once all of them are ejected. It backs the read-only get_read_db sessions;
+    units of work that read their own writes use get_db, on the primary.
+
+    Args:
+        replicas (Optional[ReplicaSet]): Replicas to read from, the
+            primary (the session's bind) is used when None.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if (
+            self.replicas is None
+            or self._flushing
+            or clause is None
+            or not isinstance(clause, Select)
+            or clause._for_update_arg is not None
+        ):
+            return primary
+
+        if self.replica is None or not self.replicas.is_available(self.replica):
+            self.replica = self._connect_replica()
+        return self.replica or primary
+
+    def _connect_replica(self) -> Optional[Engine]:
+        """A replica this session is connected to, None if none accepted
+
+        The connection is opened here rather than by the statement, so a
+        replica refusing it is ejected and the next one tried, instead of
+        failing the request.
+        """
+
+        for _ in range(len(self.replicas.engines)):
+            engine = self.replicas.choose()
+            if engine is None:
+                return None
+            try:
+                self.connection(bind_arguments={"bind": engine})
+            except OperationalError:
+                continue
+            return engine
+        return None
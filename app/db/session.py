@@ -0,0 +1,80 @@
+"""Request-scoped sessions holding a connection only while they need one
+
+A RequestSession creates its session on first use, and the session checks
+out a pooled connection on its first query. The connection goes back to
+the pool as soon as the unit of work ends (commit or rollback), so a
+request only holds one while it's actually talking to the database.
+"""
+
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session, sessionmaker
+
+
+READ_ONLY = "read_only"
+
+
+@event.listens_for(Session, "before_flush")
+def _forbid_flush(session: Session, flush_context, instances) -> None:
+    if session.info.get(READ_ONLY):
+        raise InvalidRequestError("Can't flush a read-only session")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _forbid_writes(orm_execute_state) -> None:
+    if orm_execute_state.session.info.get(READ_ONLY) and (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        raise InvalidRequestError("Can't write through a read-only session")
+
+
+class RequestSession:
+    """Session of one request, created when first used
+
+    Attributes not defined here are looked up on the session, so it can be
+    used wherever a Session is expected. A request that never touches the
+    database never creates a session.
+
+    Args:
+        factory (sessionmaker): Factory of the underlying session.
+        read_only (bool): Whether writes are rejected. A read-only session
+            is rolled back instead of committed when the request ends.
+    """
+
+    def __init__(self, factory: sessionmaker, read_only: bool = False):
+        self._factory = factory
+        self._session: Optional[Session] = None
+        self.read_only = read_only
+
+    @property
+    def session(self) -> Session:
+        if self._session is None:
+            self._session = self._factory()
+            if self.read_only:
+                self._session.info[READ_ONLY] = True
+        return self._session
+
+    def __getattr__(self, name: str):
+        return getattr(self.session, name)
+
+    def finish(self) -> None:
+        """End the unit of work left open by the request, if any
+
+        A read-write session commits it, a read-only one rolls it back.
+        Either way its connection goes back to the pool.
+        """
+
+        if self._session is None or not self._session.in_transaction():
+            return
+        if self.read_only:
+            self._session.rollback()
+        else:
+            self._session.commit()
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
@@ -1,31 +1,76 @@
-import uvicorn
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, status
+from fastapi import Depends, FastAPI
 from fastapi import HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import IntegrityError
 from starlette.middleware.sessions import SessionMiddleware
 
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from app.core.config import settings
-from app.utils.logger import logger
+from app.core.rate_limit import limiter
+from app.core.responses import JSONResponseClass
+from app.core.http_cache import anonymous_response
+from app.core.dependencies.security import require_internal_key
+from app.core.middleware.metrics import (
+    MetricsMiddleware,
+    archive_snapshot,
+    flush_metrics_periodically,
+    render_prometheus,
+)
+from app.core.middleware.profiling import ProfilingMiddleware
+from app.core.middleware.query_stats import QueryStatsMiddleware
+from app.utils.logger import logger, start_log_listener, stop_log_listener
+from app.utils import password_utils
+from app.utils.jwt_keys import get_keyring
+from app.utils.revocation import refresh_revocation_filter
+from app.db import database
 from app.api.v1 import main_router
 
 
+async def warm_up_database_pools(connections: int) -> None:
+    """Open database connections before serving, a failure only delays them"""
+
+    try:
+        opened = await asyncio.to_thread(database.warm_up_pool, connections)
+        if settings.DATABASE_ASYNC:
+            await database.async_warm_up_pool(connections)
+        logger.info(f"Opened {opened} database connections")
+    except Exception as e:
+        logger.error(f"Database pool warm-up failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    start_log_listener()
+    # Parse the signing keys now, so a bad key fails the startup
+    get_keyring()
+    rounds = await asyncio.to_thread(password_utils.setup_password_hashing)
+    if rounds:
+        logger.info(f"Hashing passwords with {rounds} bcrypt rounds")
+    password_utils.start_hashing_executor()
+    if settings.DATABASE_POOL_WARMUP:
+        await warm_up_database_pools(settings.DATABASE_POOL_WARMUP)
+    background_tasks = [asyncio.create_task(refresh_revocation_filter())]
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        background_tasks.append(asyncio.create_task(flush_metrics_periodically()))
     logger.info("Application started")
     yield
+    for task in background_tasks:
+        task.cancel()
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        archive_snapshot()
+    password_utils.shutdown_hashing_executor()
+    if settings.DATABASE_ASYNC:
+        await database.async_dispose_engine()
     logger.info("Application shutdown")
+    stop_log_listener()
 
 
-limiter = Limiter(key_func=get_remote_address)
-
 app = FastAPI(
     title="Boilerplate",
     description="FastAPI Boilerplate Application",
@@ -34,6 +79,7 @@ app = FastAPI(
     docs_url="/v1/docs",
     redoc_url="/v1/redoc",
     openapi_url="/v1/openapi.json",
+    default_response_class=JSONResponseClass,
 
 )
 
@@ -48,22 +94,44 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.SQL_SERVER_TIMING:
+    app.add_middleware(QueryStatsMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 app.include_router(main_router)
 
 
 @app.get("/", tags=["Home"])
-@limiter.limit("5/minute")
+@limiter.limit(settings.RATE_LIMIT_DEFAULT)
 async def get_root(request: Request) -> dict:
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={"URL": "", "message": "Welcome to the boilerplate API"},
+    return anonymous_response(
+        request, lambda: {"URL": "", "message": "Welcome to the boilerplate API"}
     )
 
 
 @app.get("/probe", tags=["Home"])
-async def probe():
-    return {"message": "I am the Python FastAPI API responding"}
+async def probe(request: Request):
+    return anonymous_response(
+        request, lambda: {"message": "I am the Python FastAPI API responding"}
+    )
+
+
+if settings.METRICS_ENABLED:
+
+    @app.get(
+        "/metrics",
+        include_in_schema=False,
+        dependencies=[Depends(require_internal_key)],
+    )
+    async def get_metrics():
+        """Request metrics in the Prometheus text format"""
+
+        return PlainTextResponse(
+            render_prometheus(), media_type="text/plain; version=0.0.4"
+        )
 
 
 # REGISTER EXCEPTION HANDLERS
@@ -73,13 +141,15 @@ async def http_exception(request: Request, exc: HTTPException):
 
     logger.error(f"HTTP Exception occured; {exc}")
 
-    return JSONResponse(
+    return JSONResponseClass(
         status_code=exc.status_code,
         content={
             "status": False,
             "status_code": exc.status_code,
             "message": exc.detail,
         },
+        # Retry-After on 429s, WWW-Authenticate on 401s
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -92,9 +162,11 @@ async def validation_exception(request: Request, exc: RequestValidationError):
         for error in exc.errors()
     ]
 
-    logger.error(f"Validation Exception occured; {errors}")
+    logger.error(
+        f"Validation Exception occured; {errors}", extra={"sample_key": "validation"}
+    )
 
-    return JSONResponse(
+    return JSONResponseClass(
         status_code=422,
         content={
             "status": False,
@@ -111,7 +183,7 @@ async def integrity_exception(request: Request, exc: IntegrityError):
 
     logger.error(f"Integrity Exception occured; {exc}")
 
-    return JSONResponse(
+    return JSONResponseClass(
         status_code=400,
         content={
             "status": False,
@@ -127,7 +199,7 @@ async def exception(request: Request, exc: Exception):
 
     logger.error(f"Exception occured; {exc}")
 
-    return JSONResponse(
+    return JSONResponseClass(
         status_code=500,
         content={
             "status": False,
@@ -143,7 +215,7 @@ async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded):
 
     logger.error(f"Rate limit exceeded! {exc}")
 
-    return JSONResponse(
+    return JSONResponseClass(
         status_code=429,
         content={
             "status": False,
@@ -154,9 +226,12 @@ async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded):
 
 
 if __name__ == "__main__":
+    # Development server, use `python -m app.server` in production
+    import uvicorn
+
     uvicorn.run(
-        "main:app",
-        port=7001,
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
         reload=True,
-        workers=4,
     )
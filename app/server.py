@@ -0,0 +1,331 @@
+"""Production server: uvicorn workers forked from a preloaded app
+
+Usage:
+    python -m app.server [--host HOST] [--port PORT] [--workers N]
+
+The app is imported once by the supervisor and every worker is forked
+from it, so what's loaded at import is shared copy-on-write between the
+workers. They accept connections from one listening socket and run on
+uvloop and httptools when those are installed.
+
+Signals handled by the supervisor:
+- SIGHUP: replace the workers one by one, stopping each old worker once
+  its replacement is serving. A replacement that fails to start is killed
+  and the remaining old workers are kept
+- SIGTTIN / SIGTTOU: add / remove a worker
+- SIGTERM / SIGINT: stop the workers gracefully and exit
+
+A worker exits after SERVER_MAX_REQUESTS requests, plus a random jitter
+so the workers don't restart together, and is replaced like any worker
+that exits.
+"""
+
+import argparse
+import gc
+import os
+import random
+import select
+import signal
+import socket
+import time
+from importlib.util import find_spec
+from typing import Optional
+
+import uvicorn
+
+from app.core.config import settings
+from app.utils.logger import logger
+
+# A worker exiting with an error sooner than this after its start is
+# considered failing to boot, and replaced after a pause
+BOOT_SECONDS = 5.0
+# How long a worker may take to start serving during a rolling restart
+READY_TIMEOUT = 60.0
+
+
+def event_loop() -> str:
+    return "uvloop" if find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if find_spec("httptools") else "h11"
+
+
+def worker_config(app) -> uvicorn.Config:
+    """uvicorn settings of one worker, with its own max requests jitter"""
+
+    max_requests = None
+    if settings.SERVER_MAX_REQUESTS:
+        max_requests = settings.SERVER_MAX_REQUESTS + random.randint(
+            0, settings.SERVER_MAX_REQUESTS_JITTER
+        )
+
+    return uvicorn.Config(
+        app,
+        loop=event_loop(),
+        http=http_protocol(),
+        lifespan="on",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_TIMEOUT,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY or None,
+        limit_max_requests=max_requests,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+    )
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Listening socket shared by the workers"""
+
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server telling the supervisor when it's serving
+
+    Args:
+        config (uvicorn.Config): Settings of the worker.
+        ready_fd (int): Pipe written to once the app has started.
+    """
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets: Optional[list[socket.socket]] = None) -> None:
+        await super().startup(sockets=sockets)
+        try:
+            if not self.should_exit:
+                os.write(self.ready_fd, b"1")
+        except OSError:
+            pass
+        finally:
+            os.close(self.ready_fd)
+
+
+class Supervisor:
+    """Forks the workers and keeps their number, see the module docstring
+
+    Args:
+        app: The preloaded ASGI app.
+        sock (socket.socket): Listening socket shared by the workers.
+        workers (int): Number of workers to run.
+    """
+
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        # Start times of the workers, by pid
+        self.children: dict[int, float] = {}
+        # Workers asked to stop and not reaped yet
+        self.retiring: set[int] = set()
+        self.signals: list[int] = []
+        self.stopping = False
+
+    def active(self) -> list[int]:
+        return [pid for pid in self.children if pid not in self.retiring]
+
+    def spawn(self, wait_ready: bool = False) -> tuple[int, bool]:
+        """Fork a worker
+
+        Returns:
+            tuple[int, bool]: The pid of the worker, and whether it's serving,
+                always False unless `wait_ready` is set.
+        """
+
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            self._run_worker(ready_w)
+
+        os.close(ready_w)
+        self.children[pid] = time.monotonic()
+        ready = False
+        try:
+            # Readable once the worker serves, or at EOF if it died
+            if wait_ready and select.select([ready_r], [], [], READY_TIMEOUT)[0]:
+                ready = os.read(ready_r, 1) == b"1"
+        finally:
+            os.close(ready_r)
+        logger.info(f"Booted worker {pid}")
+        return pid, ready
+
+    def _run_worker(self, ready_fd: int) -> None:
+        status = 1
+        try:
+            signal.set_wakeup_fd(-1)
+            for signum in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+                signal.signal(signum, signal.SIG_IGN)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            # uvicorn installs its own SIGTERM and SIGINT handlers
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            random.seed()
+
+            server = WorkerServer(worker_config(self.app), ready_fd)
+            server.run(sockets=[self.sock])
+            # uvicorn returns normally when the app fails to start
+            status = 0 if server.started else 3
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} failed: {e!r}")
+        finally:
+            os._exit(status)
+
+    def retire(self, pid: int) -> None:
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def kill(self, pid: int) -> None:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        os.waitpid(pid, 0)
+        self.children.pop(pid, None)
+        self.retiring.discard(pid)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, wait_status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            started_at = self.children.pop(pid, time.monotonic())
+            retired = pid in self.retiring
+            self.retiring.discard(pid)
+            code = os.waitstatus_to_exitcode(wait_status)
+            # uvicorn raises SIGTERM again once it has shut down gracefully
+            if code == 0 or (retired and code == -signal.SIGTERM):
+                logger.info(f"Worker {pid} exited")
+                continue
+
+            logger.error(f"Worker {pid} exited with status {code}")
+            if time.monotonic() - started_at < BOOT_SECONDS and not self.stopping:
+                time.sleep(1)
+
+    def reload(self) -> None:
+        """Replace the workers one at a time, without dropping connections"""
+
+        logger.info("Restarting the workers")
+        for pid in self.active():
+            if self.stopping:
+                return
+            new_pid, ready = self.spawn(wait_ready=True)
+            if not ready:
+                logger.error(
+                    f"Worker {new_pid} did not start serving, keeping the old workers"
+                )
+                self.kill(new_pid)
+                return
+            self.retire(pid)
+
+    def scale(self) -> None:
+        active = self.active()
+        while not self.stopping and len(active) < self.workers:
+            active.append(self.spawn()[0])
+        # The oldest workers go first
+        for pid in active[: max(0, len(active) - self.workers)]:
+            self.retire(pid)
+
+    def _on_signal(self, signum: int, frame) -> None:
+        if signum in (signal.SIGTERM, signal.SIGINT):
+            self.stopping = True
+        self.signals.append(signum)
+
+    def run(self) -> None:
+        wakeup_r, wakeup_w = os.pipe()
+        os.set_blocking(wakeup_r, False)
+        os.set_blocking(wakeup_w, False)
+        signal.set_wakeup_fd(wakeup_w)
+        for signum in (
+            signal.SIGHUP,
+            signal.SIGTTIN,
+            signal.SIGTTOU,
+            signal.SIGTERM,
+            signal.SIGINT,
+            signal.SIGCHLD,
+        ):
+            signal.signal(signum, self._on_signal)
+
+        try:
+            self.scale()
+            while not self.stopping:
+                select.select([wakeup_r], [], [], 1.0)
+                try:
+                    os.read(wakeup_r, 4096)
+                except BlockingIOError:
+                    pass
+
+                signals, self.signals = self.signals, []
+                self.reap()
+                if signal.SIGHUP in signals:
+                    self.reload()
+                self.workers += signals.count(signal.SIGTTIN)
+                self.workers = max(1, self.workers - signals.count(signal.SIGTTOU))
+                self.scale()
+        finally:
+            self.shutdown()
+            os.close(wakeup_r)
+            os.close(wakeup_w)
+
+    def shutdown(self) -> None:
+        """Stop the workers gracefully, killing the ones that take too long"""
+
+        logger.info("Stopping the workers")
+        for pid in list(self.children):
+            self.retire(pid)
+
+        deadline = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            logger.error(f"Killing worker {pid}")
+            self.kill(pid)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.web_concurrency,
+        help="defaults to WEB_CONCURRENCY, or one per CPU",
+    )
+    args = parser.parse_args(argv)
+
+    # The pools are sized for the actual number of workers
+    settings.WEB_CONCURRENCY = args.workers
+
+    from app.main import app
+
+    sock = bind_socket(args.host, args.port, settings.SERVER_BACKLOG)
+    logger.info(
+        f"Serving on {args.host}:{args.port} with {args.workers} workers "
+        f"({event_loop()}, {http_protocol()})"
+    )
+
+    # Objects loaded so far are never collected, so the collector of a
+    # worker doesn't touch (and copy) the pages shared with the supervisor
+    gc.collect()
+    gc.freeze()
+    Supervisor(app, sock, args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
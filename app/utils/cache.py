@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded, thread-safe LRU cache whose entries expire individually.
+
+    Entries are evicted in least recently used order once `maxsize` is
+    reached, and are dropped on lookup once their expiry has passed.
+    A `maxsize` of 0 disables the cache.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept.
+        ttl (Optional[float]): Default lifetime of an entry in seconds.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that were not.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry, refreshing its LRU position.
+        Args:
+            key (Hashable): The cache key.
+            default (Any): Value returned when the key is missing or expired.
+        Returns:
+            Any: The cached value or `default`.
+        """
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and self.timer() >= expires_at:
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """Store an entry.
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (Optional[float]): Lifetime in seconds, defaults to the cache ttl.
+            expires_at (Optional[float]): Absolute expiry on the cache timer,
+                takes precedence over `ttl`.
+        """
+
+        if self.maxsize <= 0:
+            return
+
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = None if ttl is None else self.timer() + ttl
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value."""
+
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
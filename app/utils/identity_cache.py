@@ -0,0 +1,157 @@
+import os
+import socket
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.logger import logger
+
+
+@dataclass(frozen=True)
+class UserIdentity:
+    """Immutable snapshot of the user fields needed by authenticated routes"""
+
+    id: str
+    username: str
+    email: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user) -> "UserIdentity":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "UserIdentity":
+        """Build a principal from the claims of a stateless access token"""
+        return cls(
+            id=payload["user_id"],
+            username=payload["username"],
+            email=payload["email"],
+        )
+
+
+class InvalidationChannel:
+    """Broadcast cache invalidations to the other workers on this host.
+
+    Every worker binds a unix datagram socket inside `directory` and
+    publishing sends the key to every other socket found there. Receiving
+    is non-blocking and done by draining the socket before cache lookups.
+    """
+
+    def __init__(self, directory: str, name: Optional[str] = None):
+        self.directory = directory
+        self.name = name
+        self._pid = None
+        self._sock = None
+        self.path = None
+
+    def _socket(self) -> socket.socket:
+        # Sockets are bound per process so forked workers get their own
+        if self._pid != os.getpid():
+            Path(self.directory).mkdir(parents=True, exist_ok=True)
+            self._pid = os.getpid()
+            self.path = os.path.join(
+                self.directory, f"{self.name or self._pid}.sock"
+            )
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(self.path)
+            self._sock.setblocking(False)
+        return self._sock
+
+    def publish(self, key: str) -> None:
+        """Send a key to every other worker"""
+
+        sock = self._socket()
+        data = key.encode()
+        for peer in Path(self.directory).glob("*.sock"):
+            peer = str(peer)
+            if peer == self.path:
+                continue
+            try:
+                sock.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The worker that owned this socket is gone
+                Path(peer).unlink(missing_ok=True)
+            except OSError as e:
+                logger.error(f"Identity cache invalidation to {peer} failed: {e}")
+
+    def drain(self) -> list[str]:
+        """Return every key received since the last call"""
+
+        sock = self._socket()
+        keys = []
+        while True:
+            try:
+                data = sock.recv(1024)
+            except (BlockingIOError, InterruptedError):
+                return keys
+            keys.append(data.decode())
+
+    def close(self) -> None:
+        if self._sock is not None and self._pid == os.getpid():
+            self._sock.close()
+            Path(self.path).unlink(missing_ok=True)
+        self._sock = None
+        self._pid = None
+
+
+class IdentityCache:
+    """TTL + LRU map from user id to an immutable UserIdentity.
+
+    Writes through BaseRepository subclasses that set `identity_cache`
+    invalidate entries locally and, when a channel is configured, in the
+    other workers too.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        channel: Optional[InvalidationChannel] = None,
+    ):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.channel = channel
+
+    def get(self, user_id: str) -> Optional[UserIdentity]:
+        if self.channel is not None:
+            for key in self.channel.drain():
+                self.entries.pop(key)
+        return self.entries.get(user_id)
+
+    def put(self, user) -> UserIdentity:
+        """Cache a snapshot of a User row and return it"""
+
+        identity = UserIdentity.from_user(user)
+        self.entries.set(identity.id, identity)
+        return identity
+
+    def invalidate(self, user_id: str) -> None:
+        self.entries.pop(user_id)
+        if self.channel is not None:
+            self.channel.publish(user_id)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+identity_cache = IdentityCache(
+    maxsize=settings.IDENTITY_CACHE_SIZE,
+    ttl=settings.IDENTITY_CACHE_TTL,
+    channel=(
+        InvalidationChannel(settings.IDENTITY_CACHE_CHANNEL_DIR)
+        if settings.IDENTITY_CACHE_CHANNEL_DIR
+        else None
+    ),
+)
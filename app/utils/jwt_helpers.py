@@ -1,44 +1,106 @@
-from datetime import datetime, timedelta
+import hashlib
+import time
+import uuid
+from typing import Optional
 
 from app.core.config import settings
 from app.core import response_messages
+from app.utils.cache import TTLCache
+from app.utils.jwt_keys import TokenError, get_keyring
+from app.utils.revocation import revocation_filter
 from fastapi import HTTPException
-from jose import JWTError, jwt
 
+# Claims of already verified tokens, keyed by a digest of the token and
+# expiring at the token's own `exp`
+verified_token_cache = TTLCache(maxsize=settings.JWT_CACHE_SIZE, timer=time.time)
+_verified_token_cache_keyring = None
 
-def create_jwt_token(token_type: str, user_id: str) -> str:
+# Lifetime of each token type, in seconds
+TOKEN_LIFETIMES = {
+    "access": settings.ACCESS_TOKEN_EXPIRY * 3600,
+    "refresh": settings.REFRESH_TOKEN_EXPIRY * 3600,
+}
+
+# User claims carried over from a refresh token to the new access token
+IDENTITY_CLAIMS = ("username", "email", "ver")
+
+
+def identity_claims(user) -> dict:
+    """Claims to embed for a user
+
+    The token version is always embedded so all of a user's tokens can be
+    revoked at once. In stateless auth mode the username and email are
+    embedded too, so get_current_user does not need the database.
+    """
+
+    claims = {"ver": user.token_version or 0}
+    if settings.AUTH_STATELESS:
+        claims.update(username=user.username, email=user.email)
+    return claims
+
+
+def create_jwt_token(
+    token_type: str, user_id: str, claims: Optional[dict] = None
+) -> str:
     """Function to create an access token"""
 
-    expiry_period = {
-        "access": settings.ACCESS_TOKEN_EXPIRY,
-        "refresh": settings.REFRESH_TOKEN_EXPIRY,
+    lifetime = TOKEN_LIFETIMES.get(token_type)
+    if lifetime is None:
+        raise ValueError("token_type should be 'access' or 'refresh'")
+
+    data = {
+        **(claims or {}),
+        "user_id": user_id,
+        "exp": int(time.time()) + lifetime,
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
     }
+    return get_keyring().encode(data)
 
-    if token_type not in expiry_period.keys():
-        raise ValueError("token_type should be 'access' or 'refresh'")
 
-    expire = datetime.utcnow() + timedelta(hours=expiry_period[token_type])
-    data = {"user_id": user_id, "exp": expire, "type": token_type}
-    encoded_jwt = jwt.encode(data, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+def _verified_claims(token: str) -> dict:
+    """Decode and verify a token, reusing the claims of tokens seen before
 
+    Raises:
+        TokenError: If the token is invalid or expired
+    """
+    global _verified_token_cache_keyring
 
-def verify_jwt_token(token: str, credentials_exception: HTTPException) -> str:
-    """Funtcion to decode and verify access and refresh tokens"""
+    keyring = get_keyring()
+    if keyring is not _verified_token_cache_keyring:
+        verified_token_cache.clear()
+        _verified_token_cache_keyring = keyring
+
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = verified_token_cache.get(cache_key)
+
+    if payload is None:
+        payload = keyring.decode(token)
+        if "exp" in payload:
+            verified_token_cache.set(cache_key, payload, expires_at=payload["exp"])
+
+    return payload
+
+
+def decode_jwt_token(token: str, credentials_exception: HTTPException) -> dict:
+    """Function to decode and verify a token, returning all of its claims"""
 
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("user_id")
+        payload = _verified_claims(token)
 
-        if user_id is None:
+        if payload.get("user_id") is None:
             raise credentials_exception
 
-    except JWTError:
+    except TokenError:
         raise credentials_exception
 
-    return user_id
+    return payload
+
+
+def verify_jwt_token(token: str, credentials_exception: HTTPException) -> str:
+    """Funtcion to decode and verify access and refresh tokens"""
+
+    return decode_jwt_token(token, credentials_exception)["user_id"]
 
 
 def refresh_access_token(refresh_token: str) -> str:
@@ -54,11 +116,18 @@ def refresh_access_token(refresh_token: str) -> str:
         status_code=401, detail=response_messages.EXPIRED_REFRESH_TOKEN
     )
 
-    user_id = verify_jwt_token(
+    payload = decode_jwt_token(
         token=refresh_token, credentials_exception=credentials_exception
     )
 
-    if user_id:
-        new_access_token = create_jwt_token("access", user_id=user_id)
+    # Refreshing has no database session, so a filter hit is treated as
+    # revoked; a rare false positive only means logging in again
+    if revocation_filter.might_be_revoked(payload):
+        raise credentials_exception
+
+    claims = {key: payload[key] for key in IDENTITY_CLAIMS if key in payload}
+    new_access_token = create_jwt_token(
+        "access", user_id=payload["user_id"], claims=claims
+    )
 
-        return new_access_token
+    return new_access_token
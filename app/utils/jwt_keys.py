@@ -0,0 +1,222 @@
+"""JWT signing and verification keys
+
+A Keyring holds the signing key and the verification keys, parsed once
+into backend key objects, and signs and verifies tokens through one of two
+backends:
+
+- "jose": python-jose, the default. Supports HMAC, RSA and ECDSA.
+- "pyjwt": PyJWT with cryptography (the `crypto` extra). Required for
+  EdDSA; benchmarks/jwt_throughput.py compares both for the other
+  algorithms.
+
+With an asymmetric ALGORITHM, tokens are signed with the private key at
+JWT_PRIVATE_KEY_PATH and carry JWT_KEY_ID as their `kid` header. Other
+services then only need the public keys to verify them. JWT_PUBLIC_KEYS
+maps the kids of previous (or upcoming) keys to public key files, so keys
+can be rotated without invalidating the tokens already issued.
+"""
+
+import base64
+import binascii
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from app.core.config import settings
+
+
+HMAC_ALGORITHMS = ("HS256", "HS384", "HS512")
+
+
+class TokenError(Exception):
+    """Raised when a token can't be verified, whatever the backend"""
+
+
+# The backends import their library when the keyring is built, so only the
+# configured one is loaded
+
+
+class JoseBackend:
+    def __init__(self):
+        from jose import JWTError, jwk, jwt
+
+        self.error = JWTError
+        self.jwk = jwk
+        self.jwt = jwt
+
+    def prepare_key(self, algorithm: str, material: str) -> Any:
+        if algorithm == "EdDSA":
+            raise ValueError("EdDSA tokens require JWT_BACKEND=pyjwt")
+        return self.jwk.construct(material, algorithm)
+
+    def public_key(self, key: Any) -> Any:
+        return key.public_key()
+
+    def encode(self, claims: dict, key: Any, algorithm: str, headers: dict) -> str:
+        return self.jwt.encode(claims, key, algorithm=algorithm, headers=headers or None)
+
+    def decode(self, token: str, key: Any, algorithm: str) -> dict:
+        try:
+            return self.jwt.decode(token, key, algorithms=[algorithm])
+        except self.error as e:
+            raise TokenError(str(e)) from e
+
+
+class PyJWTBackend:
+    def __init__(self):
+        try:
+            import jwt
+        except ImportError as e:
+            raise RuntimeError(
+                "JWT_BACKEND=pyjwt requires the `crypto` extra (PyJWT and cryptography)"
+            ) from e
+
+        self.jwt = jwt
+
+    def prepare_key(self, algorithm: str, material: str) -> Any:
+        return self.jwt.get_algorithm_by_name(algorithm).prepare_key(material)
+
+    def public_key(self, key: Any) -> Any:
+        return key.public_key()
+
+    def encode(self, claims: dict, key: Any, algorithm: str, headers: dict) -> str:
+        return self.jwt.encode(claims, key, algorithm=algorithm, headers=headers or None)
+
+    def decode(self, token: str, key: Any, algorithm: str) -> dict:
+        try:
+            return self.jwt.decode(token, key, algorithms=[algorithm])
+        except self.jwt.PyJWTError as e:
+            raise TokenError(str(e)) from e
+
+
+BACKENDS = {"jose": JoseBackend, "pyjwt": PyJWTBackend}
+
+
+def unverified_kid(token: str) -> Optional[str]:
+    """The `kid` header of a token, before its signature is checked
+
+    Raises:
+        TokenError: If the header can't be decoded
+    """
+
+    header = token.split(".", 1)[0]
+    try:
+        data = json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise TokenError("Invalid token header") from e
+    if not isinstance(data, dict):
+        raise TokenError("Invalid token header")
+    return data.get("kid")
+
+
+class Keyring:
+    """Prepared keys for one algorithm and backend
+
+    Args:
+        algorithm (str): JWS algorithm, e.g. HS256, ES256 or EdDSA.
+        signing_key (str): HMAC secret or PEM encoded private key.
+        signing_kid (Optional[str]): `kid` header of the issued tokens.
+        verifying_keys (Optional[dict[str, str]]): PEM encoded public keys
+            of other kids accepted when verifying.
+        backend (str): "jose" or "pyjwt".
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: str,
+        signing_kid: Optional[str] = None,
+        verifying_keys: Optional[dict[str, str]] = None,
+        backend: str = "jose",
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JWT backend {backend!r}")
+
+        self.algorithm = algorithm
+        self.backend = BACKENDS[backend]()
+        self.signing_kid = signing_kid or None
+        self.headers = {"kid": self.signing_kid} if self.signing_kid else {}
+
+        self.signing_key = self.backend.prepare_key(algorithm, signing_key)
+        default_key = (
+            self.signing_key
+            if algorithm in HMAC_ALGORITHMS
+            else self.backend.public_key(self.signing_key)
+        )
+
+        self.verifying_keys = {
+            kid: self.backend.prepare_key(algorithm, material)
+            for kid, material in (verifying_keys or {}).items()
+        }
+        # Tokens without a kid (or with ours) are checked against our own key
+        self.default_key = default_key
+        if self.signing_kid:
+            self.verifying_keys[self.signing_kid] = default_key
+
+    @classmethod
+    def from_settings(cls) -> "Keyring":
+        if settings.ALGORITHM in HMAC_ALGORITHMS:
+            signing_key = settings.SECRET_KEY
+        else:
+            signing_key = Path(settings.JWT_PRIVATE_KEY_PATH).read_text()
+
+        return cls(
+            algorithm=settings.ALGORITHM,
+            signing_key=signing_key,
+            signing_kid=settings.JWT_KEY_ID,
+            verifying_keys={
+                kid: Path(path).read_text()
+                for kid, path in settings.JWT_PUBLIC_KEYS.items()
+            },
+            backend=settings.JWT_BACKEND,
+        )
+
+    def encode(self, claims: dict) -> str:
+        """Sign the claims with the signing key"""
+
+        return self.backend.encode(claims, self.signing_key, self.algorithm, self.headers)
+
+    def decode(self, token: str) -> dict:
+        """Verify a token with the key matching its `kid`
+
+        Raises:
+            TokenError: If the token is invalid, expired or has an unknown kid
+        """
+
+        kid = unverified_kid(token)
+        if kid is None:
+            key = self.default_key
+        else:
+            key = self.verifying_keys.get(kid)
+            if key is None:
+                raise TokenError(f"Unknown key id {kid!r}")
+        return self.backend.decode(token, key, self.algorithm)
+
+
+def _settings_fingerprint() -> tuple:
+    return (
+        settings.JWT_BACKEND,
+        settings.ALGORITHM,
+        settings.SECRET_KEY,
+        settings.JWT_PRIVATE_KEY_PATH,
+        settings.JWT_KEY_ID,
+        tuple(sorted(settings.JWT_PUBLIC_KEYS.items())),
+    )
+
+
+_keyring: Optional[Keyring] = None
+_keyring_fingerprint: Optional[tuple] = None
+
+
+def get_keyring() -> Keyring:
+    """The keyring built from the settings, prepared on first use
+
+    The keyring is rebuilt if the key settings change, e.g. in tests.
+    """
+    global _keyring, _keyring_fingerprint
+
+    fingerprint = _settings_fingerprint()
+    if _keyring is None or fingerprint != _keyring_fingerprint:
+        _keyring = Keyring.from_settings()
+        _keyring_fingerprint = fingerprint
+    return _keyring
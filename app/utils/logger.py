@@ -1,51 +1,171 @@
+import json
 import logging
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+
+class LogFileHandler(RotatingFileHandler):
+    """Rotating file handler creating its directory and file on the first record"""
+
+    def __init__(self, filename: str, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of noisy records
+
+    Rates are looked up by the record's `sample_key` (passed with
+    `extra={"sample_key": ...}`) and then by its level name.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, "sample_key", None))
+        if rate is None:
+            rate = self.rates.get(record.levelname)
+        if rate is None or rate >= 1 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+log_listener: Optional[QueueListener] = None
+
+
+def setup_logger(
+    log_dir: str = "logs",
+    name: str = __name__,
+    use_queue: Optional[bool] = None,
+    json_format: Optional[bool] = None,
+) -> logging.Logger:
+    global log_listener
+
+    use_queue = settings.LOG_QUEUE if use_queue is None else use_queue
+    json_format = settings.LOG_JSON if json_format is None else json_format
 
-def setup_logger(log_dir: str = "logs") -> logging.Logger:
-    # Create logs directory if it doesn't exist
-    Path(log_dir).mkdir(exist_ok=True)
-    
     # Configure the logger
-    logger = logging.getLogger(__name__)
+    logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
-    
+
     # Log format
-    log_format = logging.Formatter(
+    log_format_class = JSONFormatter if json_format else logging.Formatter
+    log_format = log_format_class(
         "[%(asctime)s] - %(levelname)s: %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
-    
-    # File handler with rotation (10MB max size, keep 5 backup files)
-    file_handler = RotatingFileHandler(
+
+    # File handler with rotation (10MB max size, keep 5 backup files). The
+    # logs directory and files are only created once something is logged
+    file_handler = LogFileHandler(
         f"{log_dir}/app.log",
         maxBytes=10_000_000,
         backupCount=5
     )
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(log_format)
-    
+
     # Error file handler
-    error_handler = RotatingFileHandler(
+    error_handler = LogFileHandler(
         f"{log_dir}/error.log",
         maxBytes=10_000_000,
         backupCount=5
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(log_format)
-    
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(log_format)
+
+    if settings.LOG_SAMPLE_RATES:
+        logger.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    handlers = [file_handler, error_handler, console_handler]
+
+    if use_queue:
+        # Request threads only enqueue records, the listener thread started
+        # in the app lifespan does the file and console writes
+        queue_handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+        log_listener = QueueListener(
+            queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        handlers = [queue_handler]
+
     # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(error_handler)
-    logger.addHandler(console_handler)
-    
+    for handler in handlers:
+        logger.addHandler(handler)
+
     return logger
 
+
+def start_log_listener() -> None:
+    """Start writing queued records, when the queue mode is enabled"""
+
+    if log_listener is not None and log_listener._thread is None:
+        log_listener.start()
+
+
+def stop_log_listener() -> None:
+    """Flush the queued records and stop the listener thread"""
+
+    if log_listener is not None and log_listener._thread is not None:
+        log_listener.stop()
+
+
+def dropped_log_records() -> int:
+    """Number of records dropped because the log queue was full"""
+
+    return sum(
+        handler.dropped
+        for handler in logger.handlers
+        if isinstance(handler, DroppingQueueHandler)
+    )
+
+
 logger = setup_logger()
 
 # Usage example:
@@ -53,4 +173,4 @@ logger = setup_logger()
 # logger.info("Info message")
 # logger.warning("Warning message")
 # logger.error("Error message")
-# logger.critical("Critical message")
\ No newline at end of file
+# logger.critical("Critical message")
@@ -0,0 +1,165 @@
+"""Login throttling checked before any database lookup or password hashing"""
+
+import math
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from fastapi import HTTPException, status
+
+from app.core import response_messages
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.identity_cache import InvalidationChannel
+
+
+def normalize_email(email: str) -> str:
+    """Key of an account in the failure tracker"""
+
+    return email.strip().lower()
+
+
+class FailureTracker:
+    """Decaying count of failed logins per account, with exponential backoff
+
+    Each failure adds one to the account's score, which halves every
+    `half_life` seconds. From `threshold` failures on, the account is
+    blocked for `base_delay * 2 ** (failures - threshold)` seconds, capped at
+    `max_delay`. Entries are kept in a bounded LRU, so tracking a flood of
+    accounts evicts the oldest instead of growing.
+
+    Args:
+        maxsize (int): Accounts tracked at most.
+        threshold (int): Failures allowed before blocking.
+        half_life (float): Seconds for a score to decay by half.
+        base_delay (float): First blocking delay, in seconds.
+        max_delay (float): Longest blocking delay, in seconds.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        threshold: int,
+        half_life: float,
+        base_delay: float,
+        max_delay: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.half_life = half_life
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timer = timer
+        # An untouched entry has decayed to nothing long before this
+        ttl = max(max_delay, half_life * math.log2(max(threshold, 2)) * 4)
+        # Values are (score, time of the last failure, blocked until)
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._lock = threading.Lock()
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until the account may try again, 0 if it may now"""
+
+        entry = self.entries.get(key)
+        if entry is None:
+            return 0.0
+        return max(0.0, entry[2] - self.timer())
+
+    def record_failure(self, key: str) -> float:
+        """Count a failed login
+
+        Returns:
+            float: Seconds the account is now blocked for, 0 if it isn't.
+        """
+
+        with self._lock:
+            now = self.timer()
+            score, updated_at, _ = self.entries.get(key, (0.0, now, 0.0))
+            score = score * 0.5 ** ((now - updated_at) / self.half_life) + 1
+
+            # Rounded so failures milliseconds apart still count as whole ones
+            failures = math.floor(round(score, 2))
+            delay = 0.0
+            if failures >= self.threshold:
+                delay = min(
+                    self.max_delay, self.base_delay * 2 ** (failures - self.threshold)
+                )
+            self.entries.set(key, (score, now, now + delay))
+            return delay
+
+    def reset(self, key: str) -> None:
+        self.entries.pop(key)
+
+
+class UnknownEmailCache:
+    """Short-lived set of emails that have no account
+
+    Repeated logins with such an email skip the database. Registering an
+    email removes it here and, when a channel is configured, in the other
+    workers too.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: float, channel: Optional[InvalidationChannel] = None
+    ):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.channel = channel
+
+    def __contains__(self, email: str) -> bool:
+        if self.channel is not None:
+            for key in self.channel.drain():
+                self.entries.pop(key)
+        return self.entries.get(email) is not None
+
+    def add(self, email: str) -> None:
+        self.entries.set(email, True)
+
+    def discard(self, email: str) -> None:
+        self.entries.pop(email)
+        if self.channel is not None:
+            self.channel.publish(email)
+
+
+failure_tracker = FailureTracker(
+    maxsize=settings.LOGIN_TRACKER_SIZE,
+    threshold=settings.LOGIN_FAILURE_THRESHOLD,
+    half_life=settings.LOGIN_FAILURE_HALF_LIFE,
+    base_delay=settings.LOGIN_BACKOFF_BASE,
+    max_delay=settings.LOGIN_BACKOFF_MAX,
+)
+
+unknown_emails = UnknownEmailCache(
+    maxsize=settings.UNKNOWN_EMAIL_CACHE_SIZE,
+    ttl=settings.UNKNOWN_EMAIL_CACHE_TTL,
+    channel=(
+        InvalidationChannel(
+            os.path.join(settings.IDENTITY_CACHE_CHANNEL_DIR, "unknown-emails")
+        )
+        if settings.IDENTITY_CACHE_CHANNEL_DIR
+        else None
+    ),
+)
+
+
+def ensure_login_allowed(email: str) -> None:
+    """Reject a login attempt for a blocked account
+
+    Raises:
+        HTTPException: 429 with a Retry-After header while the account is blocked
+    """
+
+    retry_after = failure_tracker.retry_after(normalize_email(email))
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=response_messages.TOO_MANY_LOGIN_ATTEMPTS,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def record_login_failure(email: str) -> None:
+    failure_tracker.record_failure(normalize_email(email))
+
+
+def record_login_success(email: str) -> None:
+    failure_tracker.reset(normalize_email(email))
@@ -1,9 +1,284 @@
-from passlib.context import CryptContext
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from app.core import response_messages
+from app.core.config import settings
+
+# Built on first use, passlib is only imported once a password is hashed
+_password_context = None
+# bcrypt cost of new hashes, None for the passlib default
+_rounds: Optional[int] = None
+# Hash of a random password, verified against for logins of unknown emails
+_dummy_hash: Optional[str] = None
+
+# Hashing executor state, managed by the application lifespan
+_executor: Optional[ProcessPoolExecutor] = None
+_max_pending: int = 0
+_pending: int = 0
+_pending_lock = threading.Lock()
+
+
+def _build_context(rounds: Optional[int]):
+    from passlib.context import CryptContext
+
+    if rounds is None:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+    # Hashes one round stronger are kept, so workers calibrated one round
+    # apart don't keep rehashing each other's hashes
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds + 1,
+    )
+
+
+def get_password_context():
+    """The passlib CryptContext hashing the passwords"""
+    global _password_context
+
+    if _password_context is None:
+        _password_context = _build_context(_rounds)
+    return _password_context
+
+
+def configure_password_hashing(rounds: Optional[int]) -> None:
+    """Hash new passwords with `rounds` bcrypt rounds
+
+    Also the initializer of the hashing processes, which start with the
+    passlib default otherwise.
+    """
+    global _password_context, _rounds, _dummy_hash
+
+    _rounds = rounds
+    _password_context = _build_context(rounds)
+    _dummy_hash = None
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int = 4, max_rounds: int = 31
+) -> int:
+    """Find the bcrypt rounds whose verify time is closest to a target
+
+    Each round doubles the cost, so the rounds are extrapolated from one
+    timing at `min_rounds` and then checked with one timing at the result.
+
+    Args:
+        target_ms (float): Wanted duration of one hash or verify, in ms.
+        min_rounds (int): Lowest rounds returned.
+        max_rounds (int): Highest rounds returned.
+
+    Returns:
+        int: The calibrated rounds.
+    """
+    from passlib.hash import bcrypt
+
+    def duration_ms(rounds: int) -> float:
+        handler = bcrypt.using(rounds=rounds)
+        start = time.perf_counter()
+        handler.hash("calibration")
+        return (time.perf_counter() - start) * 1000
+
+    base = duration_ms(min_rounds)
+    rounds = min_rounds + round(math.log2(max(target_ms, base) / base))
+    rounds = max(min_rounds, min(max_rounds, rounds))
+
+    # One more timing at the result corrects an off by one extrapolation
+    measured = duration_ms(rounds)
+    if measured > target_ms * math.sqrt(2) and rounds > min_rounds:
+        rounds -= 1
+    elif measured * math.sqrt(2) < target_ms and rounds < max_rounds:
+        rounds += 1
+    return rounds
+
+
+def setup_password_hashing() -> Optional[int]:
+    """Configure the bcrypt cost from the settings, calibrating it if needed
+
+    Meant to run in the lifespan before the hashing executor starts, so its
+    processes get the same cost.
+
+    Returns:
+        Optional[int]: The rounds in use, None for the passlib default.
+    """
+
+    rounds = settings.PASSWORD_HASH_ROUNDS or None
+    if rounds is None and settings.PASSWORD_HASH_TARGET_MS:
+        rounds = calibrate_bcrypt_rounds(
+            settings.PASSWORD_HASH_TARGET_MS,
+            min_rounds=settings.PASSWORD_HASH_MIN_ROUNDS,
+            max_rounds=settings.PASSWORD_HASH_MAX_ROUNDS,
+        )
+    configure_password_hashing(rounds)
+    return rounds
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return password_context.hash(password)
+    return get_password_context().hash(password)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> str:
-    return password_context.verify(plain_password, hashed_password)
+    return get_password_context().verify(plain_password, hashed_password)
+
+
+def dummy_verify(plain_password: str) -> bool:
+    """Spend as long as a real verify, so unknown emails can't be told apart
+
+    Returns:
+        bool: Always False.
+    """
+    global _dummy_hash
+
+    if _dummy_hash is None:
+        _dummy_hash = get_password_context().hash(os.urandom(16).hex())
+    get_password_context().verify(plain_password, _dummy_hash)
+    return False
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """Verify a password and rehash it if its hash has an outdated cost
+
+    Returns:
+        tuple[bool, Optional[str]]: Whether the password matches, and the
+            new hash to store if it needs updating.
+    """
+    return get_password_context().verify_and_update(plain_password, hashed_password)
+
+
+def hashing_pool_size() -> int:
+    """Hashing processes of each web worker
+
+    PASSWORD_HASHING_WORKERS when set. Otherwise the CPUs are shared between
+    the web workers, which all start a pool, so together they run one
+    hashing process per CPU.
+    """
+
+    if settings.PASSWORD_HASHING_WORKERS:
+        return settings.PASSWORD_HASHING_WORKERS
+    return max(1, (os.cpu_count() or 1) // settings.web_concurrency)
+
+
+def start_hashing_executor(
+    workers: Optional[int] = None, max_pending: Optional[int] = None
+) -> None:
+    """Start the process pool used to run bcrypt outside the request workers
+
+    Args:
+        workers (Optional[int]): Number of hashing processes, defaults to
+            hashing_pool_size()
+        max_pending (Optional[int]): Number of hashing tasks allowed in
+            flight before new ones are rejected with a 503
+    """
+    global _executor, _max_pending
+
+    if _executor is not None:
+        return
+
+    workers = workers or hashing_pool_size()
+    _max_pending = (
+        settings.PASSWORD_HASHING_QUEUE_SIZE if max_pending is None else max_pending
+    )
+    _executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=configure_password_hashing,
+        initargs=(_rounds,),
+    )
+
+
+def shutdown_hashing_executor() -> None:
+    """Stop the hashing process pool, waiting for running tasks to finish"""
+    global _executor
+
+    if _executor is None:
+        return
+
+    _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
+
+
+def _release(_future: Future) -> None:
+    global _pending
+
+    with _pending_lock:
+        _pending -= 1
+
+
+def _submit(fn: Callable[..., Any], *args: Any) -> Future:
+    """Submit a task to the hashing pool, failing fast when it is saturated"""
+    global _pending
+
+    with _pending_lock:
+        if _pending >= _max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=response_messages.HASHING_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+
+    try:
+        future = _executor.submit(fn, *args)
+    except Exception:
+        _release(None)
+        raise
+
+    future.add_done_callback(_release)
+    return future
+
+
+def run_hashing_task(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a hashing function in the process pool and wait for the result
+
+    The calling thread blocks without holding the GIL, so this is meant for
+    sync route handlers that already run in the threadpool. Runs inline
+    when the pool has not been started.
+    """
+    if _executor is None:
+        return fn(*args)
+
+    return _submit(fn, *args).result()
+
+
+async def run_hashing_task_async(fn: Callable[..., Any], *args: Any) -> Any:
+    """Awaitable version of run_hashing_task
+
+    Falls back to a worker thread when the pool has not been started, so
+    the event loop is never blocked by bcrypt.
+    """
+    if _executor is None:
+        return await asyncio.to_thread(fn, *args)
+
+    return await asyncio.wrap_future(_submit(fn, *args))
+
+
+async def hash_password_async(password: str) -> str:
+    return await run_hashing_task_async(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_hashing_task_async(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    return await run_hashing_task_async(
+        verify_and_update_password, plain_password, hashed_password
+    )
+
+
+async def dummy_verify_async(plain_password: str) -> bool:
+    return await run_hashing_task_async(dummy_verify, plain_password)
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import database
+from app.utils.logger import logger
+from app.api.models.revoked_token import RevokedToken
+from app.api.models.user import User
+
+
+class BloomFilter:
+    """Fixed size Bloom filter over string keys.
+
+    Membership tests can return false positives but never false negatives,
+    so a negative answer is enough to accept a token without a lookup.
+    """
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size_bits
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+def revocation_keys(payload: dict) -> list[str]:
+    """Keys under which a token could have been revoked"""
+
+    keys = []
+    if "jti" in payload:
+        keys.append(f"jti:{payload['jti']}")
+    if "ver" in payload:
+        keys.append(f"ver:{payload['user_id']}:{payload['ver']}")
+    return keys
+
+
+class RevocationFilter:
+    """In-memory view of the revoked_tokens table.
+
+    The filter is rebuilt periodically from the table, and revocations made
+    by this worker are added immediately. Positive answers are confirmed
+    against the table, so false positives never reject a valid token.
+    """
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.loaded_at = None
+        self._filter = BloomFilter(size_bits, hashes)
+        self._added_during_rebuild: list[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self._filter.add(key)
+            self._added_during_rebuild.append(key)
+
+    def might_be_revoked(self, payload: dict) -> bool:
+        bloom = self._filter
+        return any(key in bloom for key in revocation_keys(payload))
+
+    def is_revoked(self, db: Session, payload: dict) -> bool:
+        """Check a token, only touching the database on a filter hit"""
+
+        if not self.might_be_revoked(payload):
+            return False
+
+        return (
+            db.scalar(
+                select(RevokedToken.id).where(
+                    RevokedToken.key.in_(revocation_keys(payload))
+                )
+            )
+            is not None
+        )
+
+    def rebuild(self, db: Session) -> None:
+        """Reload the filter from the table, purging expired revocations"""
+
+        now = datetime.now(timezone.utc)
+        db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        db.commit()
+
+        with self._lock:
+            self._added_during_rebuild = []
+
+        bloom = BloomFilter(self.size_bits, self.hashes)
+        for key in db.scalars(select(RevokedToken.key)):
+            bloom.add(key)
+
+        with self._lock:
+            for key in self._added_during_rebuild:
+                bloom.add(key)
+            self._added_during_rebuild = []
+            self._filter = bloom
+            self.loaded_at = time.monotonic()
+
+
+revocation_filter = RevocationFilter(
+    size_bits=settings.REVOCATION_FILTER_BITS,
+    hashes=settings.REVOCATION_FILTER_HASHES,
+)
+
+
+def _record(db: Session, key: str, expires_at: datetime) -> None:
+    if db.scalar(select(RevokedToken.id).where(RevokedToken.key == key)) is None:
+        db.add(RevokedToken(key=key, expires_at=expires_at))
+    revocation_filter.add(key)
+
+
+def revoke_token(db: Session, payload: dict) -> None:
+    """Revoke a single token until it would have expired anyway
+
+    Args:
+        db (Session): Database session
+        payload (dict): Verified claims of the token
+    """
+
+    expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    _record(db, f"jti:{payload['jti']}", expires_at)
+    db.commit()
+
+
+def revoke_user_tokens(db: Session, user: User) -> None:
+    """Revoke every token issued to a user so far by bumping their version
+
+    Args:
+        db (Session): Database session
+        user (User): The user whose tokens are revoked
+    """
+
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        hours=settings.REFRESH_TOKEN_EXPIRY
+    )
+    _record(db, f"ver:{user.id}:{user.token_version or 0}", expires_at)
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+
+
+def _rebuild_revocation_filter() -> None:
+    with database.SessionLocal() as db:
+        revocation_filter.rebuild(db)
+
+
+async def refresh_revocation_filter() -> None:
+    """Rebuild the revocation filter every REVOCATION_REFRESH_INTERVAL seconds
+
+    Meant to run as a background task for the lifetime of the application.
+    """
+
+    while True:
+        try:
+            await asyncio.to_thread(_rebuild_revocation_filter)
+        except Exception as e:
+            logger.error(f"Revocation filter refresh failed: {e}")
+        await asyncio.sleep(settings.REVOCATION_REFRESH_INTERVAL)
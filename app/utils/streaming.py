@@ -0,0 +1,40 @@
+import json
+from typing import Any, Callable, Iterable, Iterator
+
+from fastapi import status
+from fastapi.responses import StreamingResponse
+
+
+def ndjson_lines(
+    rows: Iterable[Any], serialize: Callable[[Any], dict]
+) -> Iterator[bytes]:
+    """Encode rows as newline delimited JSON, one line per row"""
+
+    for row in rows:
+        yield json.dumps(serialize(row), default=str).encode() + b"\n"
+
+
+def ndjson_response(
+    rows: Iterable[Any],
+    serialize: Callable[[Any], dict],
+    status_code: int = status.HTTP_200_OK,
+) -> StreamingResponse:
+    """Stream rows to the client as they are produced
+
+    Dependencies with yield are closed before a streaming body is sent, so
+    `rows` should open its own session, see the /internal/users route.
+
+    Args:
+        rows (Iterable[Any]): Rows to send, consumed lazily.
+        serialize (Callable[[Any], dict]): Turns a row into a JSON object.
+        status_code (int): Response status code.
+
+    Returns:
+        StreamingResponse: An application/x-ndjson response.
+    """
+
+    return StreamingResponse(
+        ndjson_lines(rows, serialize),
+        status_code=status_code,
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,89 @@
+"""Per-request CPU of rendering an auth response, with and without FAST_JSON
+
+Serves the same AuthResponse from two minimal apps, one with the default
+FastAPI serialization and one with ModelJSONRoute and ORJSONResponse, and
+calls them directly through ASGI so only the framework work is measured.
+
+Usage:
+    python -m benchmarks.json_encoding [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute
+
+from app.api.v1.auth import schemas
+from app.core.responses import ModelJSONRoute
+
+
+def build_app(route_class, response_class) -> FastAPI:
+    app = FastAPI(default_response_class=response_class)
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/user", response_model=schemas.AuthResponse)
+    async def get_user():
+        return schemas.AuthResponse(
+            status_code=200,
+            message="User logged in successfully",
+            access_token="a" * 200,
+            refresh_token="r" * 200,
+            data=schemas.AuthResponseData(
+                id="0194f1f4-7b6c-7d1e-8f00-000000000000",
+                username="benchmark",
+                email="benchmark@example.com",
+            ),
+        )
+
+    app.include_router(router)
+    return app
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/user",
+            "query_string": b"",
+            "headers": [],
+        }
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    default_app = build_app(APIRoute, JSONResponse)
+    fast_app = build_app(ModelJSONRoute, ORJSONResponse)
+
+    # Warm up both apps before measuring
+    asyncio.run(run(default_app, 100))
+    asyncio.run(run(fast_app, 100))
+
+    baseline = asyncio.run(run(default_app, args.requests))
+    measured = asyncio.run(run(fast_app, args.requests))
+
+    saved = (baseline - measured) / args.requests * 1e6
+    print(f"default serialization {baseline / args.requests * 1e6:8.2f} us/request")
+    print(f"FAST_JSON             {measured / args.requests * 1e6:8.2f} us/request")
+    print(f"saved                 {saved:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
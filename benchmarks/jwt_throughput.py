@@ -0,0 +1,76 @@
+"""Token encode and decode throughput per algorithm and backend
+
+Generates throwaway keys, then signs and verifies the same access token
+claims repeatedly through a Keyring. Backends or algorithms whose
+dependencies are missing are skipped.
+
+Usage:
+    python -m benchmarks.jwt_throughput [--tokens 5000]
+"""
+
+import argparse
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from app.utils.jwt_keys import Keyring
+
+ALGORITHMS = {
+    "HS256": lambda: "benchmark-secret-key-of-32-bytes",
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def signing_material(key) -> str:
+    if isinstance(key, str):
+        return key
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def claims() -> dict:
+    return {
+        "user_id": "0194f1f4-7b6c-7d1e-8f00-000000000000",
+        "exp": int(time.time()) + 3600,
+        "type": "access",
+        "ver": 0,
+        "jti": "5f0c6f1d0a2b4c3e8d7f6a5b4c3d2e1f",
+    }
+
+
+def throughput(func, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"{'algorithm':<10}{'backend':<8}{'encode/s':>12}{'decode/s':>12}")
+    for algorithm, make_key in ALGORITHMS.items():
+        material = signing_material(make_key())
+        for backend in ("jose", "pyjwt"):
+            try:
+                keyring = Keyring(algorithm, material, signing_kid="k1", backend=backend)
+            except (ValueError, RuntimeError) as e:
+                print(f"{algorithm:<10}{backend:<8}  skipped: {e}")
+                continue
+
+            payload = claims()
+            token = keyring.encode(payload)
+            encode_rate = throughput(lambda: keyring.encode(payload), args.tokens)
+            decode_rate = throughput(lambda: keyring.decode(token), args.tokens)
+            print(f"{algorithm:<10}{backend:<8}{encode_rate:>12,.0f}{decode_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Load test of the auth endpoints
+
+Runs scripted concurrent clients against the app, either in-process
+through the ASGI transport or against real uvicorn workers. By default
+the database is a throwaway SQLite file; pass --database-url to point it
+at a local Postgres instead. --async-db serves the auth routes with the
+async database stack (DATABASE_ASYNC) on the same database, to compare
+it with the sync one. Each endpoint is driven in its own phase
+(register, login, token refresh, user details) and reported with its
+requests per second and p50/p95/p99 latencies.
+
+Usage:
+    python -m benchmarks.loadtest [--mode asgi|server] [--async-db] [--concurrency 16]
+        [--output results.json] [--baseline baseline.json --threshold 0.2]
+
+With --baseline, the run exits with status 1 when an endpoint regressed
+beyond the threshold, so it can gate CI.
+
+CI compares against benchmarks/loadtest/baseline.json, recorded in ASGI
+mode with PASSWORD_HASH_ROUNDS=4 like the CI run. Record it again with
+--output when a change is meant to move the numbers.
+"""
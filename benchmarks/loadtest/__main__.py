@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+from benchmarks.loadtest import __doc__ as description
+from benchmarks.loadtest.report import compare, format_table, load_results, save_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description=description.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=description,
+    )
+    parser.add_argument("--mode", choices=("asgi", "server"), default="asgi")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=50, help="accounts registered")
+    parser.add_argument("--requests", type=int, default=500, help="per endpoint")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument(
+        "--async-db",
+        action="store_true",
+        help="serve the auth routes with the async database stack (DATABASE_ASYNC)",
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Set before the app (and its settings) is imported by the runner,
+        # the uvicorn workers inherit them too
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp_dir}/loadtest.db"
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ["DATABASE_ASYNC"] = str(args.async_db).lower()
+        os.environ["WEB_CONCURRENCY"] = str(args.workers)
+
+        from benchmarks.loadtest import runner
+
+        if args.mode == "asgi":
+            endpoints = asyncio.run(
+                runner.run_asgi(args.concurrency, args.users, args.requests)
+            )
+        else:
+            endpoints = asyncio.run(
+                runner.run_server(
+                    args.concurrency, args.users, args.requests, args.workers, args.port
+                )
+            )
+
+    results = {
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "workers": args.workers if args.mode == "server" else None,
+        "async_db": args.async_db,
+        "endpoints": endpoints,
+    }
+    print(format_table(results))
+
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
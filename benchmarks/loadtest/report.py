@@ -0,0 +1,114 @@
+"""Latency statistics, result files and baseline comparison"""
+
+import json
+import math
+from pathlib import Path
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Percentile of already sorted values, interpolating between ranks
+
+    Args:
+        sorted_values (list[float]): Values in ascending order.
+        q (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile, 0.0 for no values.
+    """
+
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(timings: list[float], errors: int, elapsed: float) -> dict:
+    """Statistics of one endpoint phase
+
+    Args:
+        timings (list[float]): Latency of each successful request, in seconds.
+        errors (int): Number of failed requests.
+        elapsed (float): Wall time of the phase, in seconds.
+
+    Returns:
+        dict: Request counts, requests per second and latencies in ms.
+    """
+
+    timings = sorted(timings)
+    requests = len(timings) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(len(timings) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 3) if timings else 0.0,
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+    }
+
+
+def save_results(results: dict, path: str) -> None:
+    Path(path).write_text(json.dumps(results, indent=2) + "\n")
+
+
+def load_results(path: str) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Endpoints that regressed against a baseline run
+
+    An endpoint regresses when its p95 or p99 latency grew, or its
+    throughput dropped, by more than `threshold` (0.2 means 20%), or when
+    it has errors the baseline didn't have.
+
+    Args:
+        results (dict): The current run.
+        baseline (dict): A previous run saved with save_results.
+        threshold (float): Tolerated relative change.
+
+    Returns:
+        list[str]: One message per regression, empty if there are none.
+    """
+
+    regressions = []
+    for endpoint, expected in baseline["endpoints"].items():
+        actual = results["endpoints"].get(endpoint)
+        if actual is None:
+            regressions.append(f"{endpoint}: missing from the results")
+            continue
+
+        for metric in ("p95_ms", "p99_ms"):
+            limit = expected[metric] * (1 + threshold)
+            if actual[metric] > limit:
+                regressions.append(
+                    f"{endpoint}: {metric} {actual[metric]:.2f} > {limit:.2f} "
+                    f"(baseline {expected[metric]:.2f})"
+                )
+
+        limit = expected["rps"] * (1 - threshold)
+        if actual["rps"] < limit:
+            regressions.append(
+                f"{endpoint}: rps {actual['rps']:.1f} < {limit:.1f} "
+                f"(baseline {expected['rps']:.1f})"
+            )
+
+        if actual["errors"] and not expected["errors"]:
+            regressions.append(f"{endpoint}: {actual['errors']} errors")
+
+    return regressions
+
+
+def format_table(results: dict) -> str:
+    lines = [
+        f"{'endpoint':<16}{'requests':>10}{'errors':>8}{'rps':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    ]
+    for endpoint, stats in results["endpoints"].items():
+        lines.append(
+            f"{endpoint:<16}{stats['requests']:>10}{stats['errors']:>8}"
+            f"{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}"
+            f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
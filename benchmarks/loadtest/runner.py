@@ -0,0 +1,174 @@
+"""Scripted clients driving the auth endpoints
+
+The app is imported here, so the settings must already be in the
+environment when this module is imported (see __main__).
+"""
+
+import asyncio
+import itertools
+import subprocess
+import sys
+import time
+import uuid
+from typing import Awaitable, Callable
+
+import httpx
+
+from app.db.database import init_db
+from app.main import app
+from benchmarks.loadtest.report import summarize
+
+API = "/api/v1/auth"
+PASSWORD = "load-test-password"
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+async def run_phase(
+    client: httpx.AsyncClient,
+    concurrency: int,
+    requests: int,
+    send: Request,
+    expected_status: int,
+) -> tuple[dict, list[httpx.Response]]:
+    """Send `requests` requests from `concurrency` concurrent clients
+
+    Returns:
+        tuple[dict, list[httpx.Response]]: The phase statistics and the
+            successful responses, by request index.
+    """
+
+    counter = itertools.count()
+    timings: list[float] = []
+    responses: list = [None] * requests
+    errors = 0
+
+    async def client_loop():
+        nonlocal errors
+        while (index := next(counter)) < requests:
+            start = time.perf_counter()
+            try:
+                response = await send(client, index)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            duration = time.perf_counter() - start
+            if response.status_code == expected_status:
+                timings.append(duration)
+                responses[index] = response
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(timings, errors, elapsed), responses
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, concurrency: int, users: int, requests: int
+) -> dict:
+    """Register `users` users, then send `requests` requests to each other endpoint"""
+
+    run_id = uuid.uuid4().hex[:8]
+    accounts = [
+        {
+            "email": f"load-{run_id}-{index}@example.com",
+            "username": f"load-{run_id}-{index}",
+            "password": PASSWORD,
+        }
+        for index in range(users)
+    ]
+    endpoints = {}
+
+    async def register(client, index):
+        return await client.post(f"{API}/register", json=accounts[index])
+
+    endpoints["register"], _ = await run_phase(client, concurrency, users, register, 201)
+
+    async def login(client, index):
+        account = accounts[index % users]
+        return await client.post(
+            f"{API}/login",
+            json={"email": account["email"], "password": account["password"]},
+        )
+
+    endpoints["login"], responses = await run_phase(
+        client, concurrency, requests, login, 200
+    )
+    tokens = [response.json() for response in responses if response is not None]
+    if not tokens:
+        raise RuntimeError("No login succeeded, check the server logs")
+
+    async def token_refresh(client, index):
+        return await client.post(
+            f"{API}/token/refresh",
+            json={"refresh_token": tokens[index % len(tokens)]["refresh_token"]},
+        )
+
+    endpoints["token_refresh"], _ = await run_phase(
+        client, concurrency, requests, token_refresh, 200
+    )
+
+    async def user(client, index):
+        access_token = tokens[index % len(tokens)]["access_token"]
+        return await client.get(
+            f"{API}/user", headers={"Authorization": f"Bearer {access_token}"}
+        )
+
+    endpoints["user"], _ = await run_phase(client, concurrency, requests, user, 200)
+
+    return endpoints
+
+
+async def run_asgi(concurrency: int, users: int, requests: int) -> dict:
+    """Run the scenario against the app in this process"""
+
+    init_db()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest", timeout=60
+        ) as client:
+            return await run_scenario(client, concurrency, users, requests)
+
+
+async def wait_until_ready(client: httpx.AsyncClient, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"The server exited with status {server.returncode}")
+        try:
+            if (await client.get("/probe")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("The server did not start within 30 seconds")
+
+
+async def run_server(
+    concurrency: int, users: int, requests: int, workers: int, port: int
+) -> dict:
+    """Run the scenario against the workers of `python -m app.server`"""
+
+    init_db()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "app.server",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(workers),
+        ]
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            timeout=60,
+            limits=httpx.Limits(max_connections=concurrency),
+        ) as client:
+            await wait_until_ready(client, server)
+            return await run_scenario(client, concurrency, users, requests)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
@@ -0,0 +1,55 @@
+"""CPU spent per rejected login, with and without the failure tracker
+
+Compares the bcrypt verify that every wrong password used to cost with
+the check rejecting a blocked account, at the configured bcrypt cost.
+
+Usage:
+    python -m benchmarks.login_throttle [--attempts 20]
+"""
+
+import argparse
+import time
+
+from fastapi import HTTPException
+
+from app.utils import login_throttle, password_utils
+
+
+def cpu_per_call(func, calls: int) -> float:
+    start = time.process_time()
+    for _ in range(calls):
+        func()
+    return (time.process_time() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=20)
+    args = parser.parse_args()
+
+    password_utils.setup_password_hashing()
+    hashed = password_utils.hash_password("correct horse battery staple")
+
+    def verify():
+        password_utils.verify_password("wrong", hashed)
+
+    email = "victim@example.com"
+    for _ in range(login_throttle.failure_tracker.threshold):
+        login_throttle.record_login_failure(email)
+
+    def rejected():
+        try:
+            login_throttle.ensure_login_allowed(email)
+        except HTTPException:
+            pass
+
+    verify_cpu = cpu_per_call(verify, args.attempts)
+    rejected_cpu = cpu_per_call(rejected, args.attempts * 10_000)
+
+    print(f"bcrypt verify     {verify_cpu * 1e6:12.1f} us CPU/attempt")
+    print(f"blocked account   {rejected_cpu * 1e6:12.1f} us CPU/attempt")
+    print(f"ratio             {verify_cpu / rejected_cpu:12,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
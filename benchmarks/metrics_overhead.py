@@ -0,0 +1,60 @@
+"""Per-request overhead of MetricsMiddleware
+
+Calls a minimal ASGI app directly, with and without the middleware, and
+reports the difference per request.
+
+Usage:
+    python -m benchmarks.metrics_overhead [--requests 200000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.middleware.metrics import MetricsMiddleware, MetricsRegistry
+
+
+class Route:
+    path = "/bench/{id}"
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/bench/1"}
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    instrumented = MetricsMiddleware(endpoint, registry=MetricsRegistry())
+
+    baseline = asyncio.run(run(endpoint, args.requests))
+    measured = asyncio.run(run(instrumented, args.requests))
+
+    overhead = (measured - baseline) / args.requests * 1e6
+    print(f"baseline     {baseline / args.requests * 1e6:8.2f} us/request")
+    print(f"with metrics {measured / args.requests * 1e6:8.2f} us/request")
+    print(f"overhead     {overhead:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Cost of one rate limit hit per storage backend
+
+Usage:
+    python -m benchmarks.rate_limit_storage [--hits 20000] [--clients 1000]
+"""
+
+import argparse
+import tempfile
+import time
+
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from app.core.rate_limit import SQLiteStorage
+
+
+def run(storage, hits: int, clients: int) -> float:
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse("1000000/minute")
+    start = time.perf_counter()
+    for i in range(hits):
+        limiter.hit(limit, f"10.0.{i % clients // 256}.{i % 256}")
+    return (time.perf_counter() - start) / hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hits", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        storages = {
+            "memory": MemoryStorage(),
+            "sqlite": SQLiteStorage(f"sqlite:///{directory}/ratelimit.db"),
+        }
+        for name, storage in storages.items():
+            per_hit = run(storage, args.hits, args.clients)
+            print(f"{name:<8}{per_hit * 1e6:8.1f} us/hit")
+
+
+if __name__ == "__main__":
+    main()
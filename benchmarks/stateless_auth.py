@@ -0,0 +1,105 @@
+"""Latency of /api/v1/auth/user with and without the database on the auth path
+
+Runs the app in-process (ASGI transport) against a temporary SQLite database and compares:
+    db:          identity cache disabled, one users lookup per request
+    db+cache:    identity cache enabled
+    stateless:   user built from the token claims (AUTH_STATELESS)
+
+Usage:
+    python -m benchmarks.stateless_auth [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.config import settings
+from app.db.database import Base, get_db, get_read_db
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+from app.utils import jwt_helpers
+from app.utils.identity_cache import identity_cache
+
+
+async def measure(headers: dict, requests: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    timings = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get("/api/v1/auth/user", headers=headers)
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".db") as db_file:
+        engine = create_engine(
+            f"sqlite:///{db_file.name}", connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=engine)
+        # Like the app's sessions, so created rows stay loaded after commit
+        SessionLocal = sessionmaker(
+            bind=engine, autoflush=False, expire_on_commit=False
+        )
+
+        def get_benchmark_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = get_benchmark_db
+        app.dependency_overrides[get_read_db] = get_benchmark_db
+
+        with SessionLocal() as db:
+            user = UserRepository(db).create(
+                User(username="bench", email="bench@example.com", password="hash")
+            )
+
+        scenarios = {
+            "db": (False, 0),
+            "db+cache": (False, settings.IDENTITY_CACHE_SIZE),
+            "stateless": (True, 0),
+        }
+
+        print(f"{'mode':<12}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}")
+        for name, (stateless, cache_size) in scenarios.items():
+            settings.AUTH_STATELESS = stateless
+            identity_cache.clear()
+            identity_cache.entries.maxsize = cache_size
+
+            token = jwt_helpers.create_jwt_token(
+                "access", user.id, claims=jwt_helpers.identity_claims(user)
+            )
+            headers = {"Authorization": f"Bearer {token}"}
+
+            asyncio.run(measure(headers, min(args.requests, 100)))
+            timings = sorted(asyncio.run(measure(headers, args.requests)))
+
+            print(
+                f"{name:<12}"
+                f"{statistics.fmean(timings) * 1e6:>10.0f}"
+                f"{timings[len(timings) // 2] * 1e6:>10.0f}"
+                f"{timings[int(len(timings) * 0.99)] * 1e6:>10.0f}"
+            )
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Fresh SQLite database with the application tables
+
+    A file rather than `sqlite://`, so the engine keeps a real pool and
+    TestClient threads see the same data.
+    """
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/test.db", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Sessions configured like the application's"""
+
+    return sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def run_with_async_db(tmp_path):
+    """Run `callback(session)` with an AsyncSession on a fresh database"""
+
+    async def run(callback):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test-async.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        try:
+            async with factory() as session:
+                return await callback(session)
+        finally:
+            await engine.dispose()
+
+    return lambda callback: asyncio.run(run(callback))
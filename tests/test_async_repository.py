@@ -0,0 +1,30 @@
+from app.core.config import settings
+from app.api.models.user import User
+from app.api.repositories.user import AsyncUserRepository
+
+
+def test_async_repository_crud(run_with_async_db):
+    async def scenario(db):
+        repository = AsyncUserRepository(db)
+        user = await repository.create(
+            User(username="async", email="async@example.com", password="hash")
+        )
+        assert user.id is not None
+        assert user.created_at is not None
+
+        fetched = await repository.get_by_email("async@example.com")
+        assert fetched.id == user.id
+        assert len(await repository.get_all()) == 1
+
+        assert await repository.delete(user.id) is True
+        assert await repository.get(user.id) is None
+
+    run_with_async_db(scenario)
+
+
+def test_async_url_follows_database_url(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", "sqlite:///bench.db")
+    assert settings.async_database_url == "sqlite+aiosqlite:///bench.db"
+
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://user:pw@db:5432/app")
+    assert settings.async_database_url == "postgresql+asyncpg://user:pw@db:5432/app"
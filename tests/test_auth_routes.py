@@ -0,0 +1,72 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core import response_messages
+from app.core.rate_limit import limiter
+from app.db.database import get_db
+from app.utils import login_throttle, password_utils
+from app.utils.login_throttle import FailureTracker, UnknownEmailCache
+
+client = TestClient(app)
+
+USER = {"email": "user@example.com", "username": "user", "password": "secret"}
+
+
+@pytest.fixture(autouse=True)
+def auth_app(db, monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", False)
+    monkeypatch.setattr(
+        login_throttle,
+        "failure_tracker",
+        FailureTracker(maxsize=10, threshold=3, half_life=60, base_delay=30, max_delay=60),
+    )
+    monkeypatch.setattr(
+        login_throttle, "unknown_emails", UnknownEmailCache(maxsize=10, ttl=60)
+    )
+    password_utils.configure_password_hashing(4)
+    app.dependency_overrides[get_db] = lambda: db
+    yield
+    app.dependency_overrides.clear()
+    password_utils.configure_password_hashing(None)
+
+
+def login(email: str, password: str):
+    return client.post("/api/v1/auth/login", json={"email": email, "password": password})
+
+
+def test_duplicate_registration_conflicts():
+    assert client.post("/api/v1/auth/register", json=USER).status_code == 201
+
+    for duplicate in (
+        USER,
+        dict(USER, username="other"),
+        dict(USER, email="other@example.com"),
+    ):
+        response = client.post("/api/v1/auth/register", json=duplicate)
+        assert response.status_code == 409
+        assert response.json()["message"] == response_messages.USER_ALREADY_EXISTS
+
+
+def test_invalid_logins_share_one_message():
+    client.post("/api/v1/auth/register", json=USER)
+
+    unknown = login("unknown@example.com", "secret")
+    wrong_password = login(USER["email"], "wrong")
+
+    for response in (unknown, wrong_password):
+        assert response.status_code == 400
+        assert response.json()["message"] == response_messages.INVALID_LOGIN
+    assert login(USER["email"], USER["password"]).status_code == 200
+
+
+def test_repeated_failures_throttle_the_account():
+    client.post("/api/v1/auth/register", json=USER)
+    for _ in range(3):
+        assert login(USER["email"], "wrong").status_code == 400
+
+    response = login(USER["email"], USER["password"])
+
+    assert response.status_code == 429
+    assert response.json()["message"] == response_messages.TOO_MANY_LOGIN_ATTEMPTS
+    assert response.headers["Retry-After"] == "30"
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core import http_cache
+from app.core.dependencies.security import get_current_user
+from app.core.http_cache import etag_matches
+from app.utils.cache import TTLCache
+from app.utils.identity_cache import UserIdentity
+
+client = TestClient(app)
+
+
+def test_etag_matches_lists_and_weak_tags():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_anonymous_responses_are_revalidated_with_their_body_etag(monkeypatch):
+    monkeypatch.setattr(http_cache, "response_cache", TTLCache(maxsize=8, ttl=60))
+
+    response = client.get("/probe")
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "public, no-cache"
+    assert http_cache.response_cache.get(str(response.url))[1] == etag
+
+    response = client.get("/probe", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_user_etag_follows_updated_at():
+    identity = UserIdentity(
+        id="user-1",
+        username="user",
+        email="user@example.com",
+        updated_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+    app.dependency_overrides[get_current_user] = lambda: identity
+    try:
+        response = client.get("/api/v1/auth/user")
+        assert response.json()["data"]["id"] == "user-1"
+        assert response.headers["Vary"] == "Authorization"
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        etag = response.headers["ETag"]
+
+        response = client.get("/api/v1/auth/user", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        identity = UserIdentity(
+            id="user-1",
+            username="renamed",
+            email="user@example.com",
+            updated_at=datetime(2026, 1, 2, tzinfo=timezone.utc),
+        )
+        response = client.get("/api/v1/auth/user", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["data"]["username"] == "renamed"
+        assert response.headers["ETag"] != etag
+    finally:
+        app.dependency_overrides.clear()
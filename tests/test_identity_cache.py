@@ -0,0 +1,51 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+from app.core.dependencies.security import get_current_user
+from app.utils import jwt_helpers
+from app.utils.identity_cache import InvalidationChannel, identity_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_identity_cache():
+    identity_cache.clear()
+
+
+def test_get_current_user_uses_identity_cache(db):
+    user = UserRepository(db).create(
+        User(username="cached", email="cached@example.com", password="hash")
+    )
+    token = jwt_helpers.create_jwt_token("access", user.id)
+
+    assert get_current_user(db=db, access_token=token).username == "cached"
+
+    # A cache hit does not need the session at all
+    assert get_current_user(db=None, access_token=token).id == user.id
+
+
+def test_repository_writes_invalidate_identity_cache(db):
+    repository = UserRepository(db)
+    user = repository.create(
+        User(username="deleted", email="deleted@example.com", password="hash")
+    )
+    token = jwt_helpers.create_jwt_token("access", user.id)
+    get_current_user(db=db, access_token=token)
+
+    repository.delete(user.id)
+
+    with pytest.raises(HTTPException):
+        get_current_user(db=db, access_token=token)
+
+
+def test_invalidation_channel_between_workers(tmp_path):
+    first = InvalidationChannel(str(tmp_path), name="first")
+    second = InvalidationChannel(str(tmp_path), name="second")
+    second.drain()
+
+    first.publish("user-id")
+
+    assert second.drain() == ["user-id"]
+    first.close()
+    second.close()
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time allowed for app.main, in microseconds
+IMPORT_TIME_BUDGET = 3_000_000
+
+# Modules that must only be loaded on first use or in the lifespan
+DEFERRED_MODULES = ("uvicorn", "jose", "jwt", "passlib.context", "psycopg2", "asyncpg")
+
+
+def import_times(module: str, cwd: Path) -> dict[str, int]:
+    """Cumulative import time of every module loaded by importing `module`"""
+
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_import_time_within_budget(tmp_path):
+    times = import_times("app.main", cwd=tmp_path)
+
+    assert times["app.main"] < IMPORT_TIME_BUDGET
+    assert [module for module in DEFERRED_MODULES if module in times] == []
+    # Log files are only created once something is logged
+    assert not (tmp_path / "logs").exists()
@@ -0,0 +1,27 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.utils import jwt_helpers
+
+credentials_exception = HTTPException(status_code=401)
+
+
+def test_verify_jwt_token_caches_claims():
+    jwt_helpers.verified_token_cache.clear()
+    token = jwt_helpers.create_jwt_token("access", "user-id")
+
+    assert jwt_helpers.verify_jwt_token(token, credentials_exception) == "user-id"
+    assert jwt_helpers.verify_jwt_token(token, credentials_exception) == "user-id"
+    assert jwt_helpers.verified_token_cache.misses == 1
+    assert jwt_helpers.verified_token_cache.hits == 1
+
+
+def test_verified_token_cache_cleared_when_secret_changes(monkeypatch):
+    token = jwt_helpers.create_jwt_token("access", "user-id")
+    jwt_helpers.verify_jwt_token(token, credentials_exception)
+
+    monkeypatch.setattr(settings, "SECRET_KEY", "rotated-secret")
+
+    with pytest.raises(HTTPException):
+        jwt_helpers.verify_jwt_token(token, credentials_exception)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app.utils.jwt_keys import Keyring, TokenError
+
+serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519  # noqa: E402
+
+
+def pem_pair(private_key) -> tuple[str, str]:
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_pem, public_pem
+
+
+def claims() -> dict:
+    return {"user_id": "user-id", "exp": int(time.time()) + 60}
+
+
+@pytest.mark.parametrize(
+    "backend, algorithm, make_key",
+    [
+        ("jose", "HS256", None),
+        ("pyjwt", "HS256", None),
+        ("jose", "ES256", lambda: ec.generate_private_key(ec.SECP256R1())),
+        ("pyjwt", "ES256", lambda: ec.generate_private_key(ec.SECP256R1())),
+        ("pyjwt", "EdDSA", ed25519.Ed25519PrivateKey.generate),
+    ],
+)
+def test_tokens_verify_with_the_public_key_only(backend, algorithm, make_key):
+    if backend == "pyjwt":
+        pytest.importorskip("jwt")
+
+    if make_key is None:
+        signing_key = verifying_key = "secret-key-of-at-least-32-bytes!"
+    else:
+        signing_key, verifying_key = pem_pair(make_key())
+
+    signer = Keyring(algorithm, signing_key, signing_kid="k1", backend=backend)
+    token = signer.encode(claims())
+
+    if make_key is None:
+        verifier = signer
+    else:
+        # A verifier holding only the public key, e.g. another service
+        verifier = Keyring(
+            algorithm,
+            pem_pair(make_key())[0],
+            verifying_keys={"k1": verifying_key},
+            backend=backend,
+        )
+
+    assert verifier.decode(token)["user_id"] == "user-id"
+
+
+def test_rotated_keys_stay_valid_until_removed():
+    old_private, old_public = pem_pair(ec.generate_private_key(ec.SECP256R1()))
+    new_private, _ = pem_pair(ec.generate_private_key(ec.SECP256R1()))
+
+    old_token = Keyring("ES256", old_private, signing_kid="old").encode(claims())
+
+    rotated = Keyring(
+        "ES256", new_private, signing_kid="new", verifying_keys={"old": old_public}
+    )
+    assert rotated.decode(old_token)["user_id"] == "user-id"
+    assert rotated.decode(rotated.encode(claims()))["user_id"] == "user-id"
+
+    retired = Keyring("ES256", new_private, signing_kid="new")
+    with pytest.raises(TokenError):
+        retired.decode(old_token)
+
+
+def test_eddsa_requires_the_pyjwt_backend():
+    private_pem, _ = pem_pair(ed25519.Ed25519PrivateKey.generate())
+
+    with pytest.raises(ValueError):
+        Keyring("EdDSA", private_pem, backend="jose")
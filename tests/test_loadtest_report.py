@@ -0,0 +1,26 @@
+from benchmarks.loadtest.report import compare, percentile, summarize
+
+
+def test_percentile_interpolates_between_ranks():
+    values = [1.0, 2.0, 3.0, 4.0]
+
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert percentile([], 99) == 0.0
+
+
+def test_compare_flags_regressions_beyond_the_threshold():
+    baseline = {"endpoints": {"login": summarize([0.010] * 100, 0, 1.0)}}
+    slightly_slower = {"endpoints": {"login": summarize([0.011] * 100, 0, 1.1)}}
+    much_slower = {"endpoints": {"login": summarize([0.020] * 100, 2, 2.0)}}
+
+    assert compare(slightly_slower, baseline, threshold=0.2) == []
+
+    regressions = compare(much_slower, baseline, threshold=0.2)
+    assert [message.split(" ")[1] for message in regressions] == [
+        "p95_ms", "p99_ms", "rps", "2",
+    ]
+    assert compare({"endpoints": {}}, baseline, threshold=0.2) == [
+        "login: missing from the results"
+    ]
@@ -0,0 +1,36 @@
+import logging
+
+from app.utils import logger as logger_module
+from app.utils.logger import SamplingFilter, setup_logger
+
+
+def test_queue_logger_writes_through_listener(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_module, "log_listener", None)
+    logger = setup_logger(str(tmp_path), name="test.queue", use_queue=True)
+
+    logger.info("queued message")
+    logger_module.start_log_listener()
+    logger_module.stop_log_listener()
+
+    assert "queued message" in (tmp_path / "app.log").read_text()
+
+
+def test_queue_logger_drops_on_overflow(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_module, "log_listener", None)
+    monkeypatch.setattr(logger_module.settings, "LOG_QUEUE_SIZE", 1)
+    logger = setup_logger(str(tmp_path), name="test.overflow", use_queue=True)
+
+    logger.info("kept")
+    logger.info("dropped")
+
+    assert logger.handlers[0].dropped == 1
+
+
+def test_sampling_filter_by_sample_key():
+    sampling = SamplingFilter({"validation": 0.0})
+    record = logging.LogRecord("test", logging.ERROR, __file__, 1, "msg", None, None)
+
+    assert sampling.filter(record)
+    record.sample_key = "validation"
+    assert not sampling.filter(record)
+    assert sampling.sampled_out == 1
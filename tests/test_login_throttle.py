@@ -0,0 +1,110 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core import response_messages
+from app.core.rate_limit import limiter
+from app.api.repositories.user import UserRepository
+from app.api.v1.auth.schemas import LoginRequest, RegisterRequest
+from app.api.services.user import UserService
+from app.utils import login_throttle, password_utils
+from app.utils.login_throttle import FailureTracker, UnknownEmailCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_failure_tracker_backs_off_exponentially_and_decays():
+    clock = Clock()
+    tracker = FailureTracker(
+        maxsize=10, threshold=3, half_life=60, base_delay=1, max_delay=4, timer=clock
+    )
+
+    assert [tracker.record_failure("a") for _ in range(5)] == [0, 0, 1, 2, 4]
+    assert tracker.retry_after("a") == 4
+    assert tracker.retry_after("b") == 0
+
+    clock.now += 600
+    assert tracker.retry_after("a") == 0
+    assert tracker.record_failure("a") == 0
+
+
+@pytest.fixture
+def service(db, monkeypatch):
+    monkeypatch.setattr(
+        login_throttle,
+        "failure_tracker",
+        FailureTracker(maxsize=10, threshold=3, half_life=60, base_delay=30, max_delay=60),
+    )
+    monkeypatch.setattr(
+        login_throttle, "unknown_emails", UnknownEmailCache(maxsize=10, ttl=60)
+    )
+    password_utils.configure_password_hashing(4)
+    yield UserService(db)
+    password_utils.configure_password_hashing(None)
+
+
+def test_blocked_account_is_rejected_before_hashing(service, monkeypatch):
+    service.register(
+        RegisterRequest(email="user@example.com", username="user", password="secret")
+    )
+    wrong = LoginRequest(email="user@example.com", password="wrong")
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc_info:
+            service.authenticate(wrong)
+        assert exc_info.value.status_code == 400
+
+    hashing_calls = []
+    monkeypatch.setattr(
+        password_utils, "run_hashing_task", lambda *args: hashing_calls.append(args)
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.authenticate(LoginRequest(email="User@Example.com", password="secret"))
+
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) > 0
+    assert hashing_calls == []
+
+
+def test_blocked_login_gets_retry_after_over_http(service, monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", False)
+    for _ in range(3):
+        login_throttle.record_login_failure("user@example.com")
+
+    response = TestClient(app).post(
+        "/api/v1/auth/login", json={"email": "user@example.com", "password": "secret"}
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert response.json()["message"] == response_messages.TOO_MANY_LOGIN_ATTEMPTS
+
+
+def test_unknown_email_skips_database_until_registered(service, monkeypatch):
+    lookups = []
+    get_by_email = UserRepository.get_by_email
+    monkeypatch.setattr(
+        UserRepository,
+        "get_by_email",
+        lambda self, email: lookups.append(email) or get_by_email(self, email),
+    )
+    login = LoginRequest(email="new@example.com", password="secret")
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.authenticate(login)
+    assert exc_info.value.detail == "Invalid email or password"
+    with pytest.raises(HTTPException):
+        service.authenticate(login)
+    assert lookups == ["new@example.com"]
+
+    service.register(
+        RegisterRequest(email="new@example.com", username="new", password="secret")
+    )
+    assert service.authenticate(login).email == "new@example.com"
@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.config import settings
+from app.core.middleware.metrics import (
+    MetricsRegistry,
+    archive_snapshot,
+    collect,
+    metrics,
+    write_snapshot,
+)
+from app.core.middleware import metrics as metrics_module
+
+client = TestClient(app)
+
+
+def test_metrics_use_templated_routes(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_KEY", "secret")
+    metrics.clear()
+    client.get("/probe")
+    client.get("/does-not-exist")
+
+    body = client.get("/metrics", headers={"X-Internal-Key": "secret"}).text
+
+    assert 'http_requests_total{method="GET",route="/probe",status="2xx"} 1' in body
+    assert 'route="<unmatched>",status="4xx"} 1' in body
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/probe",status="2xx",le="+Inf"} 1'
+        in body
+    )
+
+
+def test_collect_merges_other_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    registry = MetricsRegistry()
+    registry.observe("GET", "/probe", 200, 0.001)
+
+    other = registry.snapshot()[("GET", "/probe", "2xx")]
+    (tmp_path / f"metrics-{os.getppid()}.json").write_text(
+        json.dumps([["GET", "/probe", "2xx", other]])
+    )
+
+    assert collect(registry)[("GET", "/probe", "2xx")][0] == 2
+
+
+def test_metrics_need_the_internal_key(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_KEY", "")
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "INTERNAL_API_KEY", "secret")
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"X-Internal-Key": "wrong"}).status_code == 403
+
+
+def test_totals_of_exited_workers_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics_module, "_archived", False)
+    key = ("GET", "/probe", "2xx")
+    worker = subprocess.Popen(["true"])
+    worker.wait()
+    stale = tmp_path / f"metrics-{worker.pid}.json"
+    stale.write_text(json.dumps([list(key) + [[1, 0.1] + [0] * 12]]))
+
+    # Killed workers' snapshots are archived, and counted once
+    assert collect(MetricsRegistry())[key][0] == 1
+    assert collect(MetricsRegistry())[key][0] == 1
+    assert not stale.exists()
+
+    registry = MetricsRegistry()
+    registry.observe("GET", "/probe", 200, 0.001)
+    write_snapshot(registry)
+    archive_snapshot(registry)
+    write_snapshot(registry)
+
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == [
+        "metrics-archive.json"
+    ]
+    assert collect(MetricsRegistry())[key][0] == 2
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.config import settings
+from app.core.rate_limit import limiter
+from app.db.database import get_db
+from app.api.v1.auth.schemas import LoginRequest, RegisterRequest
+from app.api.services.user import UserService
+from app.utils import password_utils
+
+
+def test_hashing_executor_roundtrip():
+    password_utils.start_hashing_executor(workers=1, max_pending=4)
+    try:
+        hashed = password_utils.run_hashing_task(password_utils.hash_password, "secret")
+        assert asyncio.run(password_utils.verify_password_async("secret", hashed))
+        assert not asyncio.run(password_utils.verify_password_async("wrong", hashed))
+    finally:
+        password_utils.shutdown_hashing_executor()
+
+
+def test_hashing_executor_rejects_when_saturated():
+    password_utils.start_hashing_executor(workers=1, max_pending=0)
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            password_utils.run_hashing_task(password_utils.hash_password, "secret")
+        assert exc_info.value.status_code == 503
+    finally:
+        password_utils.shutdown_hashing_executor()
+
+
+def test_saturated_hashing_pool_returns_503_with_retry_after(db, monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", False)
+    app.dependency_overrides[get_db] = lambda: db
+    password_utils.start_hashing_executor(workers=1, max_pending=0)
+    try:
+        response = TestClient(app).post(
+            "/api/v1/auth/login",
+            json={"email": "saturated@example.com", "password": "secret"},
+        )
+    finally:
+        password_utils.shutdown_hashing_executor()
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_hashing_pool_is_shared_between_web_workers(monkeypatch):
+    monkeypatch.setattr(password_utils.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(settings, "PASSWORD_HASHING_WORKERS", 0)
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    assert password_utils.hashing_pool_size() == 4
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 16)
+    assert password_utils.hashing_pool_size() == 1
+
+    monkeypatch.setattr(settings, "PASSWORD_HASHING_WORKERS", 3)
+    assert password_utils.hashing_pool_size() == 3
+
+
+def test_hash_password_async_runs_inline_without_executor():
+    hashed = asyncio.run(password_utils.hash_password_async("secret"))
+    assert password_utils.verify_password("secret", hashed)
+
+
+def test_calibrate_bcrypt_rounds_stays_within_bounds():
+    assert password_utils.calibrate_bcrypt_rounds(0.001, min_rounds=4, max_rounds=6) == 4
+    assert password_utils.calibrate_bcrypt_rounds(1e6, min_rounds=4, max_rounds=6) == 6
+
+
+def test_login_rehashes_outdated_hash(db):
+    password_utils.configure_password_hashing(4)
+    UserService(db).register(
+        RegisterRequest(email="user@example.com", username="user", password="secret")
+    )
+
+    try:
+        password_utils.configure_password_hashing(5)
+        login = LoginRequest(email="user@example.com", password="secret")
+        user = UserService(db).authenticate(login)
+        assert user.password.startswith("$2b$05$")
+
+        # Up to date hashes are left alone
+        assert UserService(db).authenticate(login).password == user.password
+    finally:
+        password_utils.configure_password_hashing(None)
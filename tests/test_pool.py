@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.main import app
+from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, pool_limits
+
+client = TestClient(app)
+
+
+def test_pool_limits_split_the_budget():
+    assert pool_limits(workers=4, budget=100) == (16, 9)
+    assert pool_limits(workers=8, budget=4) == (1, 0)
+
+
+def test_instrumented_pool_counts_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        assert engine.pool.snapshot()["in_use"] == 1
+
+    stats = engine.pool.snapshot()
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["in_use"] == 0
+    engine.dispose()
+
+
+def test_pool_endpoint_requires_internal_key(monkeypatch):
+    assert client.get("/api/v1/internal/db/pool").status_code == 404
+
+    monkeypatch.setattr(settings, "INTERNAL_API_KEY", "internal")
+    assert client.get("/api/v1/internal/db/pool").status_code == 403
+
+    response = client.get(
+        "/api/v1/internal/db/pool", headers={"X-Internal-Key": "internal"}
+    )
+    assert response.status_code == 200
+    assert "checkouts" in response.json()["data"]["primary"]
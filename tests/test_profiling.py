@@ -0,0 +1,82 @@
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.middleware.profiling import (
+    ProfilingMiddleware,
+    StackSampler,
+    enforce_retention,
+)
+
+
+def burn_cpu(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def make_client(directory, sample_rate=0.0):
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow():
+        burn_cpu(0.1)
+        return {"ok": True}
+
+    app.add_middleware(
+        ProfilingMiddleware, directory=str(directory), sample_rate=sample_rate
+    )
+    return TestClient(app)
+
+
+def test_sampler_records_busy_threads():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    burn_cpu(0.05)
+    counts = sampler.stop()
+
+    assert any("burn_cpu" in stack.rsplit(";", 1)[-1] for stack in counts)
+
+
+def test_requested_profile_is_written_as_collapsed_stacks(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_KEY", "secret")
+    client = make_client(tmp_path)
+
+    response = client.get("/slow", headers={"X-Profile": "1", "X-Internal-Key": "secret"})
+
+    profile = tmp_path / response.headers["X-Profile"]
+    lines = profile.read_text().splitlines()
+    assert any("slow (" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert ";" in stack and int(count) > 0
+
+
+def test_profiles_need_a_valid_key_or_sampling(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_KEY", "secret")
+
+    response = make_client(tmp_path).get(
+        "/slow", headers={"X-Profile": "1", "X-Internal-Key": "wrong"}
+    )
+    assert "X-Profile" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+    response = make_client(tmp_path, sample_rate=1.0).get("/slow")
+    assert "X-Profile" not in response.headers
+    assert len(list(tmp_path.glob("*.collapsed"))) == 1
+
+
+def test_retention_removes_the_oldest_profiles(tmp_path):
+    for i in range(4):
+        path = tmp_path / f"{i}.collapsed"
+        path.write_text("x" * 100)
+        os.utime(path, (i, i))
+
+    enforce_retention(str(tmp_path), max_bytes=250)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "2.collapsed",
+        "3.collapsed",
+    ]
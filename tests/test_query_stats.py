@@ -0,0 +1,68 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.middleware.query_stats import QueryStatsMiddleware
+from app.db import instrumentation
+from app.db.instrumentation import assert_max_queries, count_queries, redact_parameters
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+
+
+@pytest.fixture
+def repository(db):
+    return UserRepository(db)
+
+
+def test_assert_max_queries_catches_n_plus_one(repository):
+    users = repository.create_many(
+        [
+            User(username=f"user{i}", email=f"user{i}@example.com", password="hash")
+            for i in range(3)
+        ]
+    )
+    repository.db.expunge_all()
+    ids = [user.id for user in users]
+
+    with assert_max_queries(1):
+        repository.get_many(ids)
+
+    repository.db.expunge_all()
+    with pytest.raises(AssertionError, match="3 queries executed, expected at most 1"):
+        with assert_max_queries(1):
+            [repository.get(id) for id in ids]
+
+
+def test_middleware_sends_server_timing(engine):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/queries")
+    def queries():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        return {}
+
+    response = TestClient(app).get("/queries")
+
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert response.headers["Server-Timing"].endswith('desc="2 queries"')
+
+
+def test_slow_queries_are_logged_without_parameter_values(engine, monkeypatch):
+    logged = []
+    monkeypatch.setattr(settings, "SLOW_QUERY_SECONDS", 1e-9)
+    monkeypatch.setattr(
+        instrumentation.logger, "warning", lambda msg, **kwargs: logged.append(msg)
+    )
+
+    with count_queries() as stats, engine.connect() as connection:
+        connection.execute(text("SELECT :email"), {"email": "secret@example.com"})
+
+    assert stats.count == 1
+    assert "SELECT ? parameters=('str',)" in logged[0]
+    assert "secret" not in logged[0]
+    assert redact_parameters({"id": 1, "name": None}) == {"id": "int", "name": "NoneType"}
@@ -0,0 +1,42 @@
+import time
+
+from limits import parse
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from app.core.rate_limit import SQLiteStorage
+
+
+def test_sqlite_storage_is_shared_between_workers(tmp_path):
+    uri = f"sqlite:///{tmp_path}/ratelimit.db"
+    first_worker = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    second_worker = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    limit = parse("2/minute")
+
+    assert first_worker.hit(limit, "127.0.0.1")
+    assert second_worker.hit(limit, "127.0.0.1")
+    assert not first_worker.hit(limit, "127.0.0.1")
+    assert second_worker.hit(limit, "10.0.0.1")
+
+
+def test_sqlite_storage_evicts_expired_counters(tmp_path):
+    storage = SQLiteStorage(f"sqlite:///{tmp_path}/ratelimit.db")
+    storage.incr("expired", expiry=0)
+    storage._next_eviction = 0.0
+
+    storage.incr("active", expiry=60)
+
+    rows = storage._connection().execute("SELECT key FROM rate_limits").fetchall()
+    assert rows == [("active",)]
+    assert storage.get("active") == 1
+    assert storage.get_expiry("active") > time.time()
+
+
+def test_sqlite_storage_paths_follow_sqlalchemy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = SQLiteStorage("sqlite:///ratelimit.db")
+    storage.incr("key", expiry=60)
+
+    assert storage.path == "ratelimit.db"
+    assert (tmp_path / "ratelimit.db").exists()
+    assert SQLiteStorage(f"sqlite:///{tmp_path}/abs.db").path == f"{tmp_path}/abs.db"
+    assert SQLiteStorage("sqlite://").path == ":memory:"
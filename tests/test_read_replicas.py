@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db.routing import ReplicaSet, RoutingSession
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+
+
+def sqlite_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    if path.parent.exists():
+        Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def primary(tmp_path):
+    return sqlite_engine(tmp_path / "primary.db")
+
+
+@pytest.fixture
+def replica(tmp_path):
+    return sqlite_engine(tmp_path / "replica.db")
+
+
+def make_sessions(primary, replicas):
+    return sessionmaker(
+        class_=RoutingSession, replicas=replicas, expire_on_commit=False, bind=primary
+    )
+
+
+def add_user(engine, email):
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(username=email, email=email, password="hash"))
+        db.commit()
+
+
+def test_reads_go_to_replica_and_writes_to_primary(primary, replica):
+    add_user(replica, "replicated@example.com")
+    Session = make_sessions(primary, ReplicaSet([replica]))
+
+    with Session() as db:
+        repository = UserRepository(db)
+        assert repository.get_by_email("replicated@example.com") is not None
+
+        repository.create(User(username="new", email="new@example.com", password="hash"))
+        assert repository.get_by_email("new@example.com") is None
+
+    with sessionmaker(bind=primary)() as db:
+        assert UserRepository(db).get_by_email("new@example.com") is not None
+
+
+def test_failing_replica_is_ejected_and_skipped(tmp_path, primary, replica):
+    add_user(primary, "primary@example.com")
+    dead_replica = sqlite_engine(tmp_path / "missing" / "replica.db")
+    replicas = ReplicaSet([dead_replica, replica], eject_seconds=60)
+    Session = make_sessions(primary, replicas)
+
+    add_user(replica, "replicated@example.com")
+    with Session() as db:
+        # The dead replica is skipped within the same request
+        assert UserRepository(db).get_by_email("replicated@example.com") is not None
+
+    assert not replicas.is_available(dead_replica)
+    assert [replicas.choose() for _ in range(3)] == [replica] * 3
+
+    replicas.eject(replica)
+    with Session() as db:
+        # All replicas ejected, reads fall back to the primary
+        assert UserRepository(db).get_by_email("primary@example.com") is not None
+
+
+def test_reads_fall_back_to_primary_when_every_replica_fails(tmp_path, primary):
+    add_user(primary, "primary@example.com")
+    dead_replica = sqlite_engine(tmp_path / "missing" / "replica.db")
+    Session = make_sessions(primary, ReplicaSet([dead_replica], eject_seconds=60))
+
+    with Session() as db:
+        assert UserRepository(db).get_by_email("primary@example.com") is not None
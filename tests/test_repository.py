@@ -0,0 +1,119 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+
+
+@pytest.fixture
+def repository(db):
+    return UserRepository(db)
+
+
+def make_users(count: int) -> list[User]:
+    return [
+        User(username=f"user{i}", email=f"user{i}@example.com", password="hash")
+        for i in range(count)
+    ]
+
+
+def test_create_many_in_chunks(repository):
+    users = repository.create_many(make_users(5), batch_size=2)
+
+    assert [user.username for user in users] == [f"user{i}" for i in range(5)]
+    assert all(user.id and user.created_at for user in users)
+    assert len(repository.get_all()) == 5
+
+
+def test_get_many_preserves_input_order(repository):
+    users = repository.create_many(make_users(4))
+    ids = [users[2].id, "missing", users[0].id, users[3].id]
+
+    assert [user.id for user in repository.get_many(ids, batch_size=2)] == [
+        users[2].id,
+        users[0].id,
+        users[3].id,
+    ]
+
+
+def test_upsert_many_on_email(repository):
+    existing = repository.create_many(make_users(1))[0]
+
+    repository.upsert_many(
+        [
+            {"username": "renamed", "email": "user0@example.com", "password": "new"},
+            {"username": "fresh", "email": "fresh@example.com", "password": "hash"},
+        ]
+    )
+
+    assert repository.get_by_email("user0@example.com").id == existing.id
+    assert repository.get_by_email("user0@example.com").username == "renamed"
+    assert repository.get_by_email("fresh@example.com") is not None
+
+
+def test_upsert_many_rejects_conflicts_on_username_only(repository):
+    repository.create_many(make_users(1))
+
+    with pytest.raises(IntegrityError):
+        repository.upsert_many(
+            [{"username": "user0", "email": "other@example.com", "password": "hash"}]
+        )
+    repository.db.rollback()
+
+    assert repository.get_by_email("other@example.com") is None
+    assert repository.get_by_email("user0@example.com").username == "user0"
+
+
+def test_iter_all_streams_every_row(repository):
+    repository.create_many(make_users(5))
+
+    assert len(list(repository.iter_all(batch_size=2))) == 5
+
+
+def test_page_after_walks_pages_by_id(repository):
+    users = repository.create_many(make_users(5))
+
+    first = repository.page_after(None, limit=2)
+    second = repository.page_after(first[-1].id, limit=2)
+    last = repository.page_after(second[-1].id, limit=2)
+
+    assert [user.id for user in first + second + last] == sorted(u.id for u in users)
+    assert repository.page_after(last[-1].id, limit=2) == []
+
+
+def test_create_returns_server_defaults(repository):
+    user = repository.create(make_users(1)[0])
+
+    assert user.created_at is not None
+    assert user.token_version == 0
+
+
+def test_create_if_absent_detects_conflicts(repository):
+    assert repository.create_if_absent(make_users(1)[0]) is not None
+
+    duplicate = User(username="other", email="user0@example.com", password="hash")
+    assert repository.create_if_absent(duplicate) is None
+    assert len(repository.get_all()) == 1
+
+
+def test_update_fields_and_delete_by_id(repository):
+    user = repository.create(make_users(1)[0])
+
+    updated = repository.update_fields(user.id, username="renamed")
+    assert updated.username == "renamed"
+    assert updated.email == "user0@example.com"
+    assert repository.update_fields("missing", username="nobody") is None
+
+    assert repository.delete_by_id(user.id) is True
+    assert repository.delete_by_id(user.id) is False
+
+
+def test_update_many_and_delete_many(repository):
+    users = repository.create_many(make_users(5))
+    ids = [user.id for user in users]
+
+    assert repository.update_many(ids[:3], batch_size=2, password="reset") == 3
+    assert [user.password for user in repository.get_many(ids)].count("reset") == 3
+
+    assert repository.delete_many(ids[1:] + ["missing"], batch_size=2) == 4
+    assert [user.id for user in repository.get_all()] == ids[:1]
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.auth import schemas
+from app.core.responses import ModelJSONRoute
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    router = APIRouter(route_class=ModelJSONRoute)
+
+    @router.get("/model", response_model=schemas.UserResponse)
+    def get_model():
+        return schemas.UserResponse(
+            status_code=200,
+            message="User Details Retrieved",
+            data=schemas.AuthResponseData(
+                id="1", username="user", email="user@example.com"
+            ),
+        )
+
+    @router.get("/dict", response_model=schemas.UserResponse, status_code=202)
+    async def get_dict():
+        return {
+            "status_code": 202,
+            "message": "From a dict",
+            "data": {"id": "2", "username": "user", "email": "user@example.com"},
+            "extra": "dropped by validation",
+        }
+
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_declared_model_is_rendered_directly():
+    response = make_client().get("/model")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "status_code": 200,
+        "message": "User Details Retrieved",
+        "data": {"id": "1", "username": "user", "email": "user@example.com"},
+    }
+
+
+def test_other_return_values_are_still_validated():
+    response = make_client().get("/dict")
+
+    assert response.status_code == 202
+    assert "extra" not in response.json()
+    assert response.json()["data"]["id"] == "2"
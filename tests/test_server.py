@@ -0,0 +1,104 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from app.core.config import settings
+from app.server import Supervisor, bind_socket, worker_config
+
+
+def test_worker_config_jitters_max_requests(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_MAX_REQUESTS", 1000)
+    monkeypatch.setattr(settings, "SERVER_MAX_REQUESTS_JITTER", 50)
+    monkeypatch.setattr(settings, "SERVER_LIMIT_CONCURRENCY", 0)
+
+    config = worker_config(app=None)
+
+    assert 1000 <= config.limit_max_requests <= 1050
+    assert config.limit_concurrency is None
+
+
+async def failing_app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await receive()
+        await send({"type": "lifespan.startup.failed", "message": "boom"})
+
+
+def test_reload_keeps_the_old_worker_when_the_new_one_fails():
+    old_worker = subprocess.Popen(["sleep", "30"])
+    sock = bind_socket("127.0.0.1", 0, backlog=8)
+    supervisor = Supervisor(failing_app, sock, workers=1)
+    supervisor.children[old_worker.pid] = time.monotonic()
+    try:
+        supervisor.reload()
+
+        assert list(supervisor.children) == [old_worker.pid]
+        assert supervisor.retiring == set()
+        assert old_worker.poll() is None
+    finally:
+        old_worker.kill()
+        old_worker.wait()
+        sock.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(condition, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.2)
+    raise AssertionError("Condition not met in time")
+
+
+def workers_of(pid: int) -> set[int]:
+    output = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True)
+    return {int(line) for line in output.stdout.split()}
+
+
+def probe(port: int) -> bool:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/probe", timeout=2) as r:
+            return r.status == 200
+    except OSError:
+        return False
+
+
+def test_server_restarts_workers_and_stops_gracefully(tmp_path):
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp_path}/server.db",
+        SERVER_GRACEFUL_TIMEOUT="5",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "2"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(lambda: probe(port))
+        workers = wait_for(lambda: len(workers_of(server.pid)) == 2 and workers_of(server.pid))
+
+        server.send_signal(signal.SIGHUP)
+        wait_for(lambda: len(workers_of(server.pid) - workers) == 2)
+        wait_for(lambda: len(workers_of(server.pid)) == 2)
+        assert probe(port)
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from app.db.session import RequestSession
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+
+
+def test_session_is_created_on_first_use(session_factory):
+    db = RequestSession(session_factory)
+    db.finish()
+    db.close()
+    assert db._session is None
+
+    db.scalar(select(User.id))
+    assert db._session is not None
+
+
+def test_connection_is_held_from_first_query_until_commit(engine, session_factory):
+    db = RequestSession(session_factory)
+    repository = UserRepository(db)
+    assert engine.pool.checkedout() == 0
+
+    db.scalar(select(User.id))
+    assert engine.pool.checkedout() == 1
+
+    repository.create(User(username="a", email="a@example.com", password="hash"))
+    assert engine.pool.checkedout() == 0
+    db.close()
+
+
+def test_read_write_session_commits_leftover_work(engine, session_factory):
+    db = RequestSession(session_factory)
+    db.add(User(username="b", email="b@example.com", password="hash"))
+    db.flush()
+    db.finish()
+    assert engine.pool.checkedout() == 0
+    db.close()
+
+    with session_factory() as check:
+        assert check.scalar(select(User.email)) == "b@example.com"
+
+
+def test_read_only_session_rejects_writes(engine, session_factory):
+    db = RequestSession(session_factory, read_only=True)
+
+    db.add(User(username="c", email="c@example.com", password="hash"))
+    with pytest.raises(InvalidRequestError):
+        db.flush()
+    db.rollback()
+
+    with pytest.raises(InvalidRequestError):
+        UserRepository(db).update_fields(1, username="d")
+
+    db.scalar(select(User.id))
+    db.finish()
+    assert engine.pool.checkedout() == 0
+    db.close()
@@ -0,0 +1,86 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.config import settings
+from app.db.database import get_db, get_read_db
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+from app.utils import jwt_helpers
+from app.utils.identity_cache import identity_cache
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def stateless_app(db, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    identity_cache.clear()
+    yield
+    app.dependency_overrides.clear()
+
+
+def login(user: User) -> dict:
+    claims = jwt_helpers.identity_claims(user)
+    return {
+        "access_token": jwt_helpers.create_jwt_token("access", user.id, claims=claims),
+        "refresh_token": jwt_helpers.create_jwt_token("refresh", user.id, claims=claims),
+    }
+
+
+def test_stateless_user_is_built_from_token(db):
+    user = UserRepository(db).create(
+        User(username="stateless", email="stateless@example.com", password="hash")
+    )
+    tokens = login(user)
+
+    # The claims are enough, even once the row is gone
+    UserRepository(db).delete(user.id)
+
+    response = client.get(
+        "/api/v1/auth/user",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["data"]["username"] == "stateless"
+
+
+def test_logout_revokes_tokens(db):
+    user = UserRepository(db).create(
+        User(username="logout", email="logout@example.com", password="hash")
+    )
+    tokens = login(user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    response = client.post(
+        "/api/v1/auth/logout",
+        headers=headers,
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/auth/user", headers=headers).status_code == 401
+    response = client.post(
+        "/api/v1/auth/token/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert response.status_code == 401
+
+
+def test_logout_without_body_revokes_only_the_access_token(db):
+    user = UserRepository(db).create(
+        User(username="access", email="access@example.com", password="hash")
+    )
+    tokens = login(user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    assert client.post("/api/v1/auth/logout", headers=headers).status_code == 200
+
+    assert client.get("/api/v1/auth/user", headers=headers).status_code == 401
+    response = client.post(
+        "/api/v1/auth/token/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert response.status_code == 200
@@ -0,0 +1,53 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import app as main_app
+from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+from app.api.v1.internal import routes as internal_routes
+from app.core.config import settings
+from app.utils.streaming import ndjson_response
+
+app = FastAPI()
+
+
+@app.get("/rows")
+def rows():
+    return ndjson_response(range(3), lambda row: {"row": row})
+
+
+client = TestClient(app)
+
+
+def test_ndjson_response():
+    response = client.get("/rows")
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"row": 0},
+        {"row": 1},
+        {"row": 2},
+    ]
+
+
+def test_users_are_exported_as_ndjson(db, session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_KEY", "internal")
+    monkeypatch.setattr(
+        internal_routes, "get_read_session_factory", lambda: session_factory
+    )
+    users = UserRepository(db).create_many(
+        [
+            User(username=f"user{i}", email=f"user{i}@example.com", password="hash")
+            for i in range(3)
+        ]
+    )
+
+    response = TestClient(main_app).get(
+        "/api/v1/internal/users", headers={"X-Internal-Key": "internal"}
+    )
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(user.id for user in users)
+    assert "password" not in rows[0]